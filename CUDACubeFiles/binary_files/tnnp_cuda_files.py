@@ -0,0 +1,133 @@
+import os
+import numpy as np
+
+
+# Binary files of TNNP-CUDA program:
+# heart.bin  - (n, n, n) signed chars, 1 - tissue point, 0 - no tissue
+# fibers.bin - (3, n, n, n) signed chars, fibers components codes (see quantize_fibers)
+# Points order is the same as in the cube array: [i][j][k] ~ x, y, z
+
+HEART_FILE_NAME = "heart.bin"
+FIBERS_FILE_NAME = "fibers.bin"
+
+
+def _write_memmap(file_name, shape, fill_slab):
+    # write to a temporary file and replace the original one, so arrays
+    # mapped to the previous version of the file stay valid
+    temp_file_name = file_name + ".tmp"
+    if np.prod(shape) == 0:
+        open(temp_file_name, "wb").close()
+    else:
+        output = np.memmap(temp_file_name, dtype="int8", mode="w+", shape=shape)
+        for i in range(shape[-3]):
+            fill_slab(output, i)
+        output.flush()
+        del output
+    os.replace(temp_file_name, file_name)
+
+
+def write_cube_points(file_name, cube_array, tissue_label=None):
+    """
+    Write heart.bin file
+
+    Parameters
+    ----------
+    file_name : str
+
+    cube_array : numpy array (n, n, n)
+
+    tissue_label : int
+        only points with this label are written as tissue,
+        if None - all nonzero points
+    """
+    def fill_slab(output, i):
+        if tissue_label is None:
+            output[i] = cube_array[i] != 0
+        else:
+            output[i] = cube_array[i] == tissue_label
+
+    _write_memmap(file_name, cube_array.shape, fill_slab)
+
+
+def write_fibers_angles(file_name, fibers_array):
+    """
+    Write fibers.bin file
+
+    Parameters
+    ----------
+    file_name : str
+
+    fibers_array : numpy array (3, n, n, n), int8
+    """
+    def fill_slab(output, i):
+        output[:, i] = fibers_array[:, i]
+
+    _write_memmap(file_name, fibers_array.shape, fill_slab)
+
+
+def get_cube_side(file_name, components=1):
+    """
+    Get cube side size from the file size
+
+    Parameters
+    ----------
+    file_name : str
+
+    components : int
+        1 for heart.bin, 3 for fibers.bin
+
+    Returns
+    -------
+    get_cube_side : int
+    """
+    points_number = os.path.getsize(file_name) // components
+    n_side = int(round(points_number ** (1./3)))
+    if n_side**3*components != os.path.getsize(file_name):
+        raise ValueError("{} size does not match a cube".format(file_name))
+    return n_side
+
+
+def open_cube_points(file_name, n_side=None, mode="r"):
+    """
+    Open heart.bin file as memory-mapped array
+
+    Parameters
+    ----------
+    file_name : str
+
+    n_side : int
+        cube side size, if None - defined by the file size
+
+    mode : str
+        numpy.memmap mode: "r" - read-only, "c" - copy-on-write, "r+" - read and write
+
+    Returns
+    -------
+    open_cube_points : numpy memmap (n, n, n), int8
+    """
+    if n_side is None:
+        n_side = get_cube_side(file_name)
+    return np.memmap(file_name, dtype="int8", mode=mode, shape=(n_side, n_side, n_side))
+
+
+def open_fibers_angles(file_name, n_side=None, mode="r"):
+    """
+    Open fibers.bin file as memory-mapped array
+
+    Parameters
+    ----------
+    file_name : str
+
+    n_side : int
+        cube side size, if None - defined by the file size
+
+    mode : str
+        numpy.memmap mode: "r" - read-only, "c" - copy-on-write, "r+" - read and write
+
+    Returns
+    -------
+    open_fibers_angles : numpy memmap (3, n, n, n), int8
+    """
+    if n_side is None:
+        n_side = get_cube_side(file_name, 3)
+    return np.memmap(file_name, dtype="int8", mode=mode, shape=(3, n_side, n_side, n_side))
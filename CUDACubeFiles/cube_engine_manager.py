@@ -1,4 +1,6 @@
 from CUDACubeFiles.cube_generator.cube_generator import CubeGenerator
+from CUDACubeFiles.cube_generator.cube_datasets import construct_image_cube
+from CUDACubeFiles.engine.cube_representation import RENDER_MODES
 
 
 class CubeEngineManager:
@@ -16,6 +18,12 @@ class CubeEngineManager:
 
         self._cube_side_size = 256
 
+        self._render_mode = "surface"  # see CubeRepresentation
+
+        self._artifact_cache = None
+        self._data_key = None  # content key of the input mesh and surfaces
+        self._cube_key = None
+
     def connect_with_scene(self, vtk_scene):
         """
         Connect with the scene
@@ -33,8 +41,31 @@ class CubeEngineManager:
         """
         self._vtk_scene.initialize_window()
 
-    def _visualize_cube(self):
-        self._vtk_scene.visualize_cube()
+    def visualize_cube(self):
+        """
+        Display the generated cube on the scene in the current render mode
+        """
+        if self._cube_generator.get_cube_array().ndim != 3:
+            return  # cube wasn't set yet
+        if self._render_mode == "points":
+            self._cube_generator.construct_cube()
+            self._vtk_scene.set_cube(self._cube_generator.get_cube())
+        else:
+            self._vtk_scene.set_cube_image(construct_image_cube(self._cube_generator.get_cube_array()))
+        self._vtk_scene.set_render_mode(self._render_mode)
+
+    def set_render_mode(self, mode):
+        """
+        Set the cube representation on the scene
+
+        Parameters
+        ----------
+        mode : str
+            "points" (vertices), "surface" or "volume" (image data, see CubeRepresentation)
+        """
+        if mode not in RENDER_MODES:
+            raise ValueError("Unknown render mode: {} (possible: {})".format(mode, ", ".join(RENDER_MODES)))
+        self._render_mode = mode
 
     def get_vtk_scene(self):
         """
@@ -57,17 +88,34 @@ class CubeEngineManager:
         """
         self._cube_side_size = size
 
-    def set_parameters(self, parameters_dict):
+    def set_parameters(self, parameters_dict, workers=None):
         """
         Set parameters entered by user
 
         Parameters
         ----------
         parameters_dict : dict
+
+        workers : int
+            number of processes for the cube generation
+            (overrides "workers" key of parameters_dict if set)
         """
+        if workers is not None:
+            parameters_dict = dict(parameters_dict, workers=workers)
         self._cube_generator.set_parameters(parameters_dict)
 
-    def set_data_dict(self, data_dict):
+    def set_artifact_cache(self, artifact_cache):
+        """
+        Set the artifacts cache to reuse the cubes generated before
+
+        Parameters
+        ----------
+        artifact_cache : object
+            LocalStorage class object
+        """
+        self._artifact_cache = artifact_cache
+
+    def set_data_dict(self, data_dict, key=None):
         """
         Set data from another package as input
 
@@ -77,19 +125,61 @@ class CubeEngineManager:
             keys:
             mesh : vtk vertex with fibers
             surface : polygonal surfaces (epi, endo, base)
+
+        key : str
+            content key of the data (see LocalStorage.compute_key),
+            the cube is always generated if None
         """
         self._cube_generator.read_mesh(data_dict["mesh"])
         self._cube_generator.read_surface(data_dict["surface"])
+        self._data_key = key
+
+    def generate_arrays(self):
+        """
+        Generate cube and fibers arrays (and the binary files) without visualization
+        (taken from the artifacts cache if they were generated before)
+        """
+        self._cube_key = None
+        artifact = None
+        if self._artifact_cache is not None and self._data_key is not None:
+            # number of processes doesn't change the result:
+            parameters_dict = {key: value for key, value in self._cube_generator.get_parameters().items()
+                               if key != "workers"}
+            self._cube_key = self._artifact_cache.compute_key("CUDACubes", self._data_key, parameters_dict)
+            artifact = self._artifact_cache.get_artifact(self._cube_key)
+
+        if artifact is not None:
+            self._cube_generator.set_arrays(artifact["cube_array"], artifact["fibers_array"])
+            self._cube_generator.write_bin_files()
+            return
+
+        self._cube_generator.generate_cubes()
+        if self._cube_key is not None:
+            # stored arrays are shared with the cache:
+            self._cube_generator.get_cube_array().flags.writeable = False
+            self._cube_generator.get_fibers().flags.writeable = False
+            self._artifact_cache.put_artifact(self._cube_key, self.get_arrays())
 
     def generate(self):
         """
         Generate cube for input mesh and entered parameters
+        (taken from the artifacts cache if they were generated before)
         """
-        self._cube_generator.generate_cubes()
-        self._cube_generator.construct_cube()
-        self._vtk_scene.set_cube(self._cube_generator.get_cube())
+        self.generate_arrays()
+        self.visualize_cube()
         self._vtk_scene.set_cube_bounds(self._cube_side_size)
 
+    def get_cube_key(self):
+        """
+        Get content key of the generated arrays (see LocalStorage.compute_key)
+
+        Returns
+        -------
+        get_cube_key : str
+            None if the artifacts cache isn't used
+        """
+        return self._cube_key
+
     def get_arrays(self):
         """
         Get cube array and and corresponding fibers as dict
@@ -0,0 +1,86 @@
+import vtk
+import numpy as np
+from vtk.util import numpy_support
+
+
+def construct_vertex_cube(cube_array, label=None):
+    """
+    Build the cube voxels as vtkUnstructuredGrid of vertices to represent on the scene.
+    Points (voxels indices) and cells are converted in bulk from numpy buffers,
+    the order is the same as in the i, j, k loops over the cube
+
+    Parameters
+    ----------
+    cube_array : numpy array
+        (n, n, n), voxels labels (0 - no tissue)
+
+    label : int
+        only voxels with this label are taken, if None - all the tissue (non zero) voxels
+
+    Returns
+    -------
+    construct_vertex_cube : vtkUnstructuredGrid
+    """
+    if label is None:
+        indices = np.argwhere(cube_array)
+    else:
+        indices = np.argwhere(cube_array == label)
+    points_number = len(indices)
+
+    vtk_points = vtk.vtkPoints()
+    vtk_points.SetData(numpy_support.numpy_to_vtk(indices.astype(np.float32), deep=True))  # vtkPoints default type
+
+    cell_array = vtk.vtkCellArray()
+    cell_array.SetData(numpy_support.numpy_to_vtkIdTypeArray(np.arange(points_number + 1), deep=True),
+                       numpy_support.numpy_to_vtkIdTypeArray(np.arange(points_number), deep=True))
+
+    cube = vtk.vtkUnstructuredGrid()
+    cube.SetPoints(vtk_points)
+    cube.SetCells(vtk.VTK_VERTEX, cell_array)
+    return cube
+
+
+def construct_image_cube(cube_array):
+    """
+    Wrap the cube array as vtkImageData with the voxels labels as scalars.
+    The array memory is shared (not copied) if it's C-contiguous, so the image changes with the array.
+    Image x axis is the last array axis: use get_image_cube_matrix to place the image
+    at the same coordinates as the construct_vertex_cube points
+
+    Parameters
+    ----------
+    cube_array : numpy array
+        (n, n, n), voxels labels (0 - no tissue)
+
+    Returns
+    -------
+    construct_image_cube : vtkImageData
+    """
+    cube_array = np.ascontiguousarray(cube_array)
+
+    scalars = numpy_support.numpy_to_vtk(cube_array.ravel(), deep=False)
+    scalars.SetName("Labels")
+    scalars._cube_array = cube_array  # keeps the shared memory alive
+
+    image = vtk.vtkImageData()
+    image.SetDimensions(cube_array.shape[2], cube_array.shape[1], cube_array.shape[0])
+    image.GetPointData().SetScalars(scalars)
+    return image
+
+
+def get_image_cube_matrix():
+    """
+    Get the matrix to swap x and z axes of the image from construct_image_cube
+    (to set as the user matrix of the prop)
+
+    Returns
+    -------
+    get_image_cube_matrix : vtkMatrix4x4
+    """
+    matrix = vtk.vtkMatrix4x4()
+    matrix.Zero()
+    matrix.SetElement(0, 2, 1)
+    matrix.SetElement(1, 1, 1)
+    matrix.SetElement(2, 0, 1)
+    matrix.SetElement(3, 3, 1)
+    return matrix
@@ -1,14 +1,22 @@
+import os
 import vtk
 from math import sqrt, degrees
-import struct
 import numpy as np
+from vtk.util.numpy_support import vtk_to_numpy
+from CUDACubeFiles.cube_generator.slab_voxelizer import SlabVoxelizer, quantize_fibers
+from CUDACubeFiles.cube_generator.slab_workers import voxelize_in_parallel
+from CUDACubeFiles.cube_generator.fibers_locator import FibersLocator
+from CUDACubeFiles.cube_generator.signed_distance_field import SignedDistanceField
+from CUDACubeFiles.cube_generator.cube_datasets import construct_vertex_cube
+from CUDACubeFiles.binary_files import tnnp_cuda_files
 
 
 class CubeGenerator:
     """
     Build cube and insert left ventricle model in it.
-    Point belonging based on left ventricle surface polygons normals directions.
-    See self._in_LV method
+    Point belonging based on left ventricle surface polygons normals directions
+    (see self._in_LV method) or on the signed distance to the closed surface
+    (see SignedDistanceField)
     """
     def __init__(self):
 
@@ -33,6 +41,16 @@ class CubeGenerator:
         # "y0cube"
         # "z0cube"
         # "dr"
+        # "voxelization" - "batched" (default) or "pointwise"
+        # "workers" - number of processes for the batched voxelization (1 by default)
+        # "fibers_neighbours" - mesh points to interpolate a voxel fiber from
+        #                       (1 by default - the closest point fiber)
+        # "classifier" - "normals" (default) or "distance" (signed distance field)
+        # "distance_threshold" - max signed distance of the inside points (0. by default)
+
+        self._output_directory = ""  # binary files directory (current by default)
+
+        self._distance_field = SignedDistanceField()
 
         self._point_locator_epi = vtk.vtkPointLocator()
         self._point_locator_endo = vtk.vtkPointLocator()
@@ -55,20 +73,33 @@ class CubeGenerator:
         """
         Build cube for input mesh ang generate a binary files
         """
-        # should be faster
         n_side = self._parameters_dict["n_side"]
-        x0cube = self._parameters_dict["x0cube"]
-        y0cube = self._parameters_dict["y0cube"]
-        z0cube = self._parameters_dict["z0cube"]
-        dr = self._parameters_dict["dr"]
 
         self._cube_array = np.zeros([n_side, n_side, n_side], dtype="int8")
-        self._fibers_array = np.zeros([3, n_side, n_side, n_side], dtype=str)
+        # fibers components as signed char codes (see quantize_fibers):
+        self._fibers_array = np.zeros([3, n_side, n_side, n_side], dtype="int8")
 
         self.compute_normals(self._surface["epi"], "epi")
         self.compute_normals(self._surface["endo"], "endo")
         self.compute_normals(self._surface["base"], "base")
 
+        if self._parameters_dict.get("classifier", "normals") == "distance":
+            self._generate_cubes_distance()
+        elif self._parameters_dict.get("voxelization", "batched") == "pointwise":
+            self._generate_cubes_pointwise()
+        else:
+            self._generate_cubes_batched()
+
+        self.write_bin_files()
+
+    def _generate_cubes_pointwise(self):
+        # reference algorithm: point by point with vtk locators
+        n_side = self._parameters_dict["n_side"]
+        x0cube = self._parameters_dict["x0cube"]
+        y0cube = self._parameters_dict["y0cube"]
+        z0cube = self._parameters_dict["z0cube"]
+        dr = self._parameters_dict["dr"]
+
         self._point_locator_epi.SetDataSet(self._surface["epi"])
         self._point_locator_epi.Update()
         self._point_locator_endo.SetDataSet(self._surface["endo"])
@@ -82,21 +113,76 @@ class CubeGenerator:
                     point = [x0cube+dr*i,
                              y0cube+dr*j,
                              z0cube+dr*k]
-                    if self._in_LV(point, j):
+                    if self._in_LV(point):
                         self._cube_array[i][j][k] = 1
                         point_id = self._mesh.FindPoint(point)
                         vec = self._mesh_vectors.GetTuple(point_id)
-                        self._fibers_array[0][i][j][k] = self._float_to_char(vec[0])
-                        self._fibers_array[1][i][j][k] = self._float_to_char(vec[1])
-                        self._fibers_array[2][i][j][k] = self._float_to_char(vec[2])
-                    else:
-                        self._fibers_array[0][i][j][k] = self._float_to_char(0)
-                        self._fibers_array[1][i][j][k] = self._float_to_char(0)
-                        self._fibers_array[2][i][j][k] = self._float_to_char(0)
+                        self._fibers_array[:, i, j, k] = quantize_fibers(vec, self._SCALE_CHAR)
             print (i)
 
-        self.write_cube_points("heart.bin")
-        self.write_fibers_angles("fibers.bin")
+    def _generate_cubes_batched(self):
+        # all points of the slab are processed at once (numpy arrays)
+        n_side = self._parameters_dict["n_side"]
+        workers = self._parameters_dict.get("workers", 1)
+
+        voxelizer = self.create_voxelizer()
+
+        if workers > 1:
+            self._cube_array, self._fibers_array = voxelize_in_parallel(voxelizer, n_side, workers,
+                                                                        self._SCALE_CHAR)
+            return
+
+        slab_size = voxelizer.get_slab_size()
+        for i_start in range(0, n_side, slab_size):
+            i_stop = min(i_start + slab_size, n_side)
+            cube_slab, fibers_slab = voxelizer.voxelize(i_start, i_stop)
+            self._cube_array[i_start:i_stop] = cube_slab
+            self._fibers_array[:, i_start:i_stop] = quantize_fibers(fibers_slab, self._SCALE_CHAR)
+
+    def _generate_cubes_distance(self):
+        # inside test is a threshold of the signed distance field
+        dr = self._parameters_dict["dr"]
+        origin = np.array([self._parameters_dict["x0cube"],
+                           self._parameters_dict["y0cube"],
+                           self._parameters_dict["z0cube"]], dtype=float)
+
+        self._distance_field.set_surface(self._surface)
+        self._distance_field.set_parameters(self._parameters_dict)
+        self._distance_field.compute()
+
+        inside = self._distance_field.get_inside_mask(self._parameters_dict.get("distance_threshold", 0.))
+        self._cube_array[inside] = 1
+
+        fibers_locator = FibersLocator(vtk_to_numpy(self._mesh.GetPoints().GetData()),
+                                       vtk_to_numpy(self._mesh_vectors),
+                                       self._parameters_dict.get("fibers_neighbours", 1))
+
+        inside_ids = np.argwhere(inside)
+        chunk_points = 2**20
+        for start in range(0, len(inside_ids), chunk_points):
+            ids = inside_ids[start:start + chunk_points]
+            codes = quantize_fibers(fibers_locator.find_fibers(origin + dr*ids), self._SCALE_CHAR)
+            self._fibers_array[:, ids[:, 0], ids[:, 1], ids[:, 2]] = codes.T
+
+    def create_voxelizer(self):
+        """
+        Create vectorized voxelizer for the current surfaces, mesh and parameters.
+        Surfaces normals should be computed before
+
+        Returns
+        -------
+        create_voxelizer : SlabVoxelizer
+        """
+        surfaces = {}
+        for surface_type in ("epi", "endo", "base"):
+            polydata = self._surface[surface_type]
+            surfaces[surface_type] = [vtk_to_numpy(polydata.GetPoints().GetData()),
+                                      vtk_to_numpy(polydata.GetPointData().GetVectors())]
+
+        return SlabVoxelizer(surfaces,
+                             vtk_to_numpy(self._mesh.GetPoints().GetData()),
+                             vtk_to_numpy(self._mesh_vectors),
+                             self._parameters_dict)
 
     def _in_LV(self, point):
         epi_id = self._point_locator_epi.FindClosestPoint(point)
@@ -138,8 +224,7 @@ class CubeGenerator:
         ----------
         file_name : str
         """
-        char_array = np.where(self._cube_array, chr(1), chr(0))
-        char_array.tofile(file_name)
+        tnnp_cuda_files.write_cube_points(file_name, self._cube_array)
 
     def write_fibers_angles(self, file_name):
         """
@@ -149,30 +234,20 @@ class CubeGenerator:
         ----------
         file_name : str
         """
-        self._fibers_array.tofile(file_name)
+        tnnp_cuda_files.write_fibers_angles(file_name, self._fibers_array)
+
+    def write_bin_files(self):
+        """
+        Write heart.bin and fibers.bin files to the output directory
+        """
+        self.write_cube_points(os.path.join(self._output_directory, tnnp_cuda_files.HEART_FILE_NAME))
+        self.write_fibers_angles(os.path.join(self._output_directory, tnnp_cuda_files.FIBERS_FILE_NAME))
 
     def construct_cube(self):
         """
         Build left ventricle in cube as vtkUnstructuredGrid to represent on the scene
         """
-        self._cube = vtk.vtkUnstructuredGrid()
-
-        points = vtk.vtkPoints()
-
-        cube_side = len(self._cube_array)
-
-        ii = 0
-        for i in range(cube_side):
-            for j in range(cube_side):
-                for k in range(cube_side):
-                    if self._cube_array[i][j][k]:
-                        points.InsertPoint(ii, i, j, k)
-                        vertex = vtk.vtkVertex()
-                        vertex.GetPointIds().SetId(0, ii)
-                        self._cube.InsertNextCell(vertex.GetCellType(), vertex.GetPointIds())
-                        ii += 1
-
-        self._cube.SetPoints(points)
+        self._cube = construct_vertex_cube(self._cube_array)
 
     def set_parameters(self, parameters_dict):
         """
@@ -184,6 +259,39 @@ class CubeGenerator:
         """
         self._parameters_dict = parameters_dict
 
+    def set_arrays(self, cube_array, fibers_array):
+        """
+        Set the cube and fibers arrays (e.g. generated before) instead of the generation
+
+        Parameters
+        ----------
+        cube_array : numpy array (n, n, n), int8
+
+        fibers_array : numpy array (3, n, n, n), int8
+        """
+        self._cube_array = cube_array
+        self._fibers_array = fibers_array
+
+    def set_output_directory(self, directory):
+        """
+        Set directory for the binary files
+
+        Parameters
+        ----------
+        directory : str
+        """
+        self._output_directory = directory
+
+    def get_parameters(self):
+        """
+        Get parameters
+
+        Returns
+        -------
+        get_parameters : dict
+        """
+        return self._parameters_dict
+
     def get_cube(self):
         """
         Get vtk object represented cube
@@ -205,6 +313,17 @@ class CubeGenerator:
         """
         return self._cube_array
 
+    def get_distance_field(self):
+        """
+        Get signed distance field of the last generation with "distance" classifier
+        (distance to the closest surface, negative inside the wall)
+
+        Returns
+        -------
+        get_distance_field : numpy array
+        """
+        return self._distance_field.get_distance_array()
+
     def get_fibers(self):
         """
         Get fibers array
@@ -212,12 +331,10 @@ class CubeGenerator:
         Returns
         -------
         get_fibers : numpy array
+            (3, n, n, n), int8 - fibers components as signed char codes
         """
         return self._fibers_array
 
-    def _float_to_char(self, value):
-        return struct.pack("b", (int(value*self._SCALE_CHAR + 0.5)))  # magic for TNNP-CUDA program
-
     def compute_normals(self, polydata, surface_type):
         """
         Compute normals for the left ventricle surface polygons
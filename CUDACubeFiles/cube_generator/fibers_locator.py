@@ -0,0 +1,92 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class FibersLocator:
+    """
+    Spatial index (KD-tree) over the vertex mesh points to find fibers for arbitrary points.
+    Built once, queried by (N, 3) arrays of points.
+
+    With neighbours_number = 1 the fiber of the closest mesh point is taken
+    (same as vtkUnstructuredGrid.FindPoint + GetTuple), otherwise fibers of the
+    k closest points are interpolated with the inverse distance weights
+    """
+    def __init__(self, points, fibers, neighbours_number=1, power=2.):
+        """
+        Parameters
+        ----------
+        points : numpy array (N, 3)
+            mesh points
+
+        fibers : numpy array (N, 3)
+            fibers in the mesh points
+
+        neighbours_number : int
+            number of the closest mesh points used for a query point
+
+        power : float
+            inverse distance weights power
+        """
+        self._fibers = np.array(fibers, dtype=float)
+        self._tree = cKDTree(points)
+
+        self._neighbours_number = min(neighbours_number, len(self._fibers))
+        self._power = power
+
+    def get_neighbours_number(self):
+        """
+        Get number of the closest mesh points used for a query point
+
+        Returns
+        -------
+        get_neighbours_number : int
+        """
+        return self._neighbours_number
+
+    def find_point_ids(self, points):
+        """
+        Find the closest mesh points
+
+        Parameters
+        ----------
+        points : numpy array (N, 3)
+
+        Returns
+        -------
+        find_point_ids : numpy array (N, )
+        """
+        _, ids = self._tree.query(points)
+        return ids
+
+    def find_fibers(self, points):
+        """
+        Find fibers for the points
+
+        Parameters
+        ----------
+        points : numpy array (N, 3)
+
+        Returns
+        -------
+        find_fibers : numpy array (N, 3)
+        """
+        if len(points) == 0:
+            return np.zeros((0, 3))
+
+        if self._neighbours_number == 1:
+            return self._fibers[self.find_point_ids(points)]
+
+        distances, ids = self._tree.query(points, k=self._neighbours_number)
+
+        with np.errstate(divide="ignore"):
+            weights = 1./distances**self._power
+        # point coincides with a mesh point - take its fiber only:
+        exact = distances[:, 0] == 0
+        weights[exact] = 0.
+        weights[exact, 0] = 1.
+
+        fibers = np.einsum("nk,nkc->nc", weights, self._fibers[ids])
+
+        norm = np.linalg.norm(fibers, axis=1, keepdims=True)
+        norm[norm == 0] = 1.
+        return fibers/norm
@@ -0,0 +1,128 @@
+import vtk
+import numpy as np
+from vtk.util.numpy_support import vtk_to_numpy
+
+
+class SignedDistanceField:
+    """
+    Signed distance to the closed left ventricle surface (epi + endo + base)
+    sampled on the cube grid in one pass.
+    Negative values - inside the wall, positive - outside,
+    absolute value - distance to the closest surface
+    """
+    def __init__(self):
+        self._surface = {}
+        self._parameters_dict = {}
+
+        self._closed_surface = None
+        self._distance_array = np.array([])
+
+    def set_surface(self, surface):
+        """
+        Set the left ventricle surfaces
+
+        Parameters
+        ----------
+        surface : dict
+            keys: epi, endo, base
+            values: vtkPolyData
+        """
+        self._surface = surface
+
+    def set_parameters(self, parameters_dict):
+        """
+        Set cube parameters
+
+        Parameters
+        ----------
+        parameters_dict : dict
+            n_side, x0cube, y0cube, z0cube, dr
+        """
+        self._parameters_dict = parameters_dict
+
+    def get_closed_surface(self):
+        """
+        Get the joined surfaces with outward oriented polygons
+
+        Returns
+        -------
+        get_closed_surface : vtkPolyData
+        """
+        return self._closed_surface
+
+    def get_distance_array(self):
+        """
+        Get the signed distance field
+
+        Returns
+        -------
+        get_distance_array : numpy array (n, n, n)
+            indexed as the cube array ([i][j][k] ~ x, y, z)
+        """
+        return self._distance_array
+
+    def get_inside_mask(self, threshold=0.):
+        """
+        Get the cube points inside the wall
+
+        Parameters
+        ----------
+        threshold : float
+            points with distance <= threshold are inside
+
+        Returns
+        -------
+        get_inside_mask : numpy array (n, n, n), bool
+        """
+        return self._distance_array <= threshold
+
+    def _assembly_closed_surface(self):
+        # polygons orientation defines the distance sign, it should point outward of the wall.
+        # Triangulated surfaces are open at the seams, so the orientation can't be found
+        # automatically; the same convention as in CubeGenerator.compute_normals is used
+        # (where epi normals point into the wall, endo and base normals - out of it):
+        append_filter = vtk.vtkAppendPolyData()
+        for surface_type in ("epi", "endo", "base"):
+            polydata_normals = vtk.vtkPolyDataNormals()
+            polydata_normals.SetInputData(self._surface[surface_type])
+            polydata_normals.SplittingOff()
+            if surface_type == "epi":
+                polydata_normals.FlipNormalsOn()
+            append_filter.AddInputConnection(polydata_normals.GetOutputPort())
+
+        # merge coincident points on the surfaces borders:
+        clean_filter = vtk.vtkCleanPolyData()
+        clean_filter.SetInputConnection(append_filter.GetOutputPort())
+        clean_filter.Update()
+
+        self._closed_surface = clean_filter.GetOutput()
+
+    def compute(self):
+        """
+        Compute the signed distance field on the cube grid
+        """
+        self._assembly_closed_surface()
+
+        n_side = self._parameters_dict["n_side"]
+        dr = self._parameters_dict["dr"]
+        origin = [self._parameters_dict["x0cube"],
+                  self._parameters_dict["y0cube"],
+                  self._parameters_dict["z0cube"]]
+
+        distance = vtk.vtkImplicitPolyDataDistance()
+        distance.SetInput(self._closed_surface)
+
+        sample_function = vtk.vtkSampleFunction()
+        sample_function.SetImplicitFunction(distance)
+        sample_function.SetModelBounds(origin[0], origin[0] + dr*(n_side - 1),
+                                       origin[1], origin[1] + dr*(n_side - 1),
+                                       origin[2], origin[2] + dr*(n_side - 1))
+        sample_function.SetSampleDimensions(n_side, n_side, n_side)
+        sample_function.SetOutputScalarTypeToDouble()
+        sample_function.ComputeNormalsOff()
+        sample_function.CappingOff()
+        sample_function.Update()
+
+        scalars = vtk_to_numpy(sample_function.GetOutput().GetPointData().GetScalars())
+        # vtkImageData points order: x index changes first
+        self._distance_array = np.ascontiguousarray(scalars.reshape([n_side]*3).transpose(2, 1, 0))
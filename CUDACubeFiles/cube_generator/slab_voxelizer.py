@@ -0,0 +1,130 @@
+import numpy as np
+from scipy.spatial import cKDTree
+from CUDACubeFiles.cube_generator.fibers_locator import FibersLocator
+
+
+def quantize_fibers(fibers, scale=127.0):
+    """
+    Convert fibers components to the signed char codes of TNNP-CUDA program.
+    Same rounding as int(value*scale + 0.5) (truncation towards zero)
+
+    Parameters
+    ----------
+    fibers : numpy array
+
+    scale : float
+
+    Returns
+    -------
+    quantize_fibers : numpy array
+        int8 array of the same shape
+    """
+    return np.trunc(np.asarray(fibers)*scale + 0.5).astype("int8")
+
+
+class SlabVoxelizer:
+    """
+    Vectorized left ventricle voxelization of the cube.
+    Cube is processed by slabs (ranges of the i index), all slab points are tested at once:
+    the same normals directions criterion as in CubeGenerator._in_LV, but with bulk
+    closest point queries (KD-trees) instead of the point by point vtkPointLocator calls.
+
+    Works with numpy copies of the surfaces and the mesh only (no vtk objects)
+    """
+    def __init__(self, surfaces, mesh_points, mesh_vectors, parameters_dict):
+        """
+        Parameters
+        ----------
+        surfaces : dict
+            keys: epi, endo, base
+            values: [points, normals] - numpy arrays (N, 3)
+
+        mesh_points : numpy array (N, 3)
+            vertex mesh points
+
+        mesh_vectors : numpy array (N, 3)
+            fibers in the mesh points
+
+        parameters_dict : dict
+            cube parameters (n_side, x0cube, y0cube, z0cube, dr,
+            fibers_neighbours - optional, see FibersLocator)
+        """
+        self._n_side = parameters_dict["n_side"]
+        self._origin = np.array([parameters_dict["x0cube"],
+                                 parameters_dict["y0cube"],
+                                 parameters_dict["z0cube"]], dtype=float)
+        self._dr = parameters_dict["dr"]
+
+        self._surfaces = []
+        for surface_type in ("epi", "endo", "base"):
+            points, normals = surfaces[surface_type]
+            self._surfaces.append((np.array(points, dtype=float),
+                                   np.array(normals, dtype=float),
+                                   cKDTree(points)))
+
+        self._fibers_locator = FibersLocator(mesh_points, mesh_vectors,
+                                             parameters_dict.get("fibers_neighbours", 1))
+
+    def get_slab_size(self, chunk_points=2**20):
+        """
+        Get number of i planes processed at once
+
+        Parameters
+        ----------
+        chunk_points : int
+            approximate number of points in one slab
+
+        Returns
+        -------
+        get_slab_size : int
+        """
+        return max(1, chunk_points // self._n_side**2)
+
+    def _slab_points(self, i_start, i_stop):
+        i, j, k = np.meshgrid(np.arange(i_start, i_stop),
+                              np.arange(self._n_side),
+                              np.arange(self._n_side), indexing="ij")
+        indices = np.stack([i.ravel(), j.ravel(), k.ravel()], axis=1)
+        return self._origin + self._dr*indices
+
+    def _in_LV(self, points):
+        # point is inside if it lies on the inner side (angle <= 90 degrees
+        # with the normal in the closest vertex) of all three surfaces:
+        inside = np.ones(len(points), dtype=bool)
+        for surface_points, normals, tree in self._surfaces:
+            candidates = np.flatnonzero(inside)
+            if not len(candidates):
+                break
+            _, ids = tree.query(points[candidates])
+            vec_to_point = points[candidates] - surface_points[ids]
+            inside[candidates] = np.einsum("ij,ij->i", vec_to_point, normals[ids]) >= 0
+        return inside
+
+    def voxelize(self, i_start, i_stop):
+        """
+        Voxelize the cube slab [i_start, i_stop)
+
+        Parameters
+        ----------
+        i_start : int
+
+        i_stop : int
+
+        Returns
+        -------
+        voxelize : list
+            [cube_slab, fibers_slab]
+            cube_slab : numpy array (i_stop - i_start, n, n), int8, 1 - tissue
+            fibers_slab : numpy array (3, i_stop - i_start, n, n), float, zero vectors outside
+        """
+        shape = (i_stop - i_start, self._n_side, self._n_side)
+        points = self._slab_points(i_start, i_stop)
+
+        inside = self._in_LV(points)
+
+        fibers = np.zeros((len(points), 3))
+        fibers[inside] = self._fibers_locator.find_fibers(points[inside])
+
+        cube_slab = inside.reshape(shape).astype("int8")
+        fibers_slab = fibers.T.reshape((3, ) + shape)
+        return [cube_slab, fibers_slab]
@@ -0,0 +1,68 @@
+import numpy as np
+from multiprocessing import Pool, RawArray
+from CUDACubeFiles.cube_generator.slab_voxelizer import quantize_fibers
+
+
+# Process pool for the slab-parallel cube generation.
+# Voxelizer (surfaces, fibers mesh and their KD-trees) and the shared result
+# buffers are passed to every worker once, by the pool initializer;
+# tasks are just slab bounds.
+
+_voxelizer = None
+_cube_array = None
+_fibers_array = None
+_scale = 127.0
+
+
+def _initialize_worker(voxelizer, cube_buffer, fibers_buffer, n_side, scale):
+    global _voxelizer, _cube_array, _fibers_array, _scale
+    _voxelizer = voxelizer
+    _cube_array = np.frombuffer(cube_buffer, dtype="int8").reshape([n_side]*3)
+    _fibers_array = np.frombuffer(fibers_buffer, dtype="int8").reshape([3] + [n_side]*3)
+    _scale = scale
+
+
+def _voxelize_slab(slab):
+    i_start, i_stop = slab
+    cube_slab, fibers_slab = _voxelizer.voxelize(i_start, i_stop)
+    _cube_array[i_start:i_stop] = cube_slab
+    _fibers_array[:, i_start:i_stop] = quantize_fibers(fibers_slab, _scale)
+
+
+def voxelize_in_parallel(voxelizer, n_side, workers, scale=127.0):
+    """
+    Voxelize the cube by slabs (along the i axis) in the process pool
+
+    Parameters
+    ----------
+    voxelizer : SlabVoxelizer
+
+    n_side : int
+
+    workers : int
+        number of processes
+
+    scale : float
+        fibers quantization scale
+
+    Returns
+    -------
+    voxelize_in_parallel : list
+        [cube_array, fibers_array]
+        cube_array : numpy array (n, n, n), int8
+        fibers_array : numpy array (3, n, n, n), int8 (quantized fibers)
+        both arrays use the shared memory buffers filled by workers
+    """
+    cube_buffer = RawArray("b", n_side**3)
+    fibers_buffer = RawArray("b", 3*n_side**3)
+
+    # several slabs per worker to balance the load:
+    slab_size = max(1, min(voxelizer.get_slab_size(), -(-n_side // (4*workers))))
+    slabs = [(i, min(i + slab_size, n_side)) for i in range(0, n_side, slab_size)]
+
+    with Pool(workers, _initialize_worker,
+              (voxelizer, cube_buffer, fibers_buffer, n_side, scale)) as pool:
+        pool.map(_voxelize_slab, slabs, chunksize=1)
+
+    return [np.frombuffer(cube_buffer, dtype="int8").reshape([n_side]*3),
+            np.frombuffer(fibers_buffer, dtype="int8").reshape([3] + [n_side]*3)]
@@ -32,10 +32,12 @@ class CubeVisualizationWidget(QtWidgets.QWidget):
             LocalStorage class object
         """
         self._local_storage = local_storage
+        self._engine_manager.set_artifact_cache(local_storage)
 
     def _set_connections(self):
         self._generate_button.clicked.connect(self.generate_cube)
         self._upload_button.clicked.connect(self.upload)
+        self._render_mode_combobox.currentIndexChanged.connect(self.set_render_mode)
 
         # self.connect(self._generate_button, QtCore.SIGNAL("clicked(bool)"),
         #             self.generate_cube)
@@ -70,6 +72,14 @@ class CubeVisualizationWidget(QtWidgets.QWidget):
         self._distance_edit = CoffeeLineEdit(self)
         self._distance_edit.setText("1.0")
         self._distance_edit.setAlignment(QtCore.Qt.AlignCenter)
+        self._workers_label = QtWidgets.QLabel("workers:", self)
+        self._workers_edit = CoffeeLineEdit(self)
+        self._workers_edit.setText("1")
+        self._workers_edit.setAlignment(QtCore.Qt.AlignCenter)
+
+        self._render_mode_label = QtWidgets.QLabel("display:", self)
+        self._render_mode_combobox = QtWidgets.QComboBox(self)
+        self._render_mode_combobox.addItems(["Surface", "Volume", "Points"])
 
         self._button_box = QtWidgets.QGroupBox("")
         self._button_layer = QtWidgets.QGridLayout()
@@ -95,8 +105,12 @@ class CubeVisualizationWidget(QtWidgets.QWidget):
         self._cube_parameters_layer.addWidget(self._dr_edit, 4, 2, 1, 2)
         self._cube_parameters_layer.addWidget(self._distance_label, 5, 0, 1, 2)
         self._cube_parameters_layer.addWidget(self._distance_edit, 5, 2, 1, 2)
-        self._cube_parameters_layer.addWidget(self._button_box, 6, 0, 1, 4)
-        self._cube_parameters_layer.setRowStretch(7, 1)
+        self._cube_parameters_layer.addWidget(self._workers_label, 6, 0, 1, 2)
+        self._cube_parameters_layer.addWidget(self._workers_edit, 6, 2, 1, 2)
+        self._cube_parameters_layer.addWidget(self._render_mode_label, 7, 0, 1, 2)
+        self._cube_parameters_layer.addWidget(self._render_mode_combobox, 7, 2, 1, 2)
+        self._cube_parameters_layer.addWidget(self._button_box, 8, 0, 1, 4)
+        self._cube_parameters_layer.setRowStretch(9, 1)
 
         self._cube_parameters_box.setLayout(self._cube_parameters_layer)
 
@@ -132,15 +146,21 @@ class CubeVisualizationWidget(QtWidgets.QWidget):
         return parameters_dict
 
     def generate_cube(self):
-        self._engine_manager.set_parameters(self.read_parameters())
+        self._engine_manager.set_parameters(self.read_parameters(),
+                                            workers=int(self._workers_edit.text()))
         self.get_mesh()
         self._engine_manager.set_cube_size(int(self._side_n_edit.text()))
         self._engine_manager.generate()
 
+    def set_render_mode(self):
+        self._engine_manager.set_render_mode(self._render_mode_combobox.currentText().lower())
+        self._engine_manager.visualize_cube()
+
     def get_mesh(self):
         data_dict = self._local_storage.get_access(self._storage_regist_key)
-        self._engine_manager.set_data_dict(data_dict)
+        self._engine_manager.set_data_dict(data_dict, self._local_storage.get_access_key(self._storage_regist_key))
 
     def upload(self):
         self._local_storage.upload_data(self._storage_regist_key,
-                                        self._engine_manager.get_arrays())
+                                        self._engine_manager.get_arrays(),
+                                        self._engine_manager.get_cube_key())
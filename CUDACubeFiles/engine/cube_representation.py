@@ -0,0 +1,130 @@
+import vtk
+from CUDACubeFiles.cube_generator.cube_datasets import get_image_cube_matrix
+
+
+RENDER_MODES = ("points", "surface", "volume")
+
+# voxels labels: 1 - normal tissue, 2 - fibrosis
+_LABELS_COLORS = {
+    1: (0.85, 0.33, 0.31),
+    2: (0.96, 0.84, 0.38)
+}
+_LABELS_OPACITIES = {
+    1: 0.15,
+    2: 0.9
+}
+
+
+class CubeRepresentation:
+    """
+    Scene objects of the cube with the voxels labels.
+    Render modes:
+    points  - vertices of the tissue voxels (vtkUnstructuredGrid, see construct_vertex_cube),
+    surface - boundaries of the labels extracted from the image (see construct_image_cube),
+    volume  - volume rendering of the image, labels are shown by colors.
+    Surface and volume props are placed by the image matrix (see get_image_cube_matrix)
+    """
+    def __init__(self):
+        self._render_mode = "surface"
+
+        self._points_mapper = vtk.vtkDataSetMapper()
+        self._points_actor = vtk.vtkActor()
+        self._points_actor.SetMapper(self._points_mapper)
+
+        self._initialize_surface()
+        self._initialize_volume()
+
+    def _initialize_surface(self):
+        self._surface_filter = vtk.vtkDiscreteFlyingEdges3D()
+        for i, label in enumerate(sorted(_LABELS_COLORS)):
+            self._surface_filter.SetValue(i, label)
+        self._surface_filter.ComputeScalarsOn()
+
+        lookup_table = vtk.vtkLookupTable()
+        lookup_table.SetNumberOfTableValues(len(_LABELS_COLORS))
+        for i, label in enumerate(sorted(_LABELS_COLORS)):
+            lookup_table.SetTableValue(i, *_LABELS_COLORS[label], 1.)
+        lookup_table.SetTableRange(min(_LABELS_COLORS), max(_LABELS_COLORS))
+        lookup_table.Build()
+
+        self._surface_mapper = vtk.vtkPolyDataMapper()
+        self._surface_mapper.SetInputConnection(self._surface_filter.GetOutputPort())
+        self._surface_mapper.SetLookupTable(lookup_table)
+        self._surface_mapper.UseLookupTableScalarRangeOn()
+
+        self._surface_actor = vtk.vtkActor()
+        self._surface_actor.SetMapper(self._surface_mapper)
+        self._surface_actor.SetUserMatrix(get_image_cube_matrix())
+
+    def _initialize_volume(self):
+        color_function = vtk.vtkColorTransferFunction()
+        opacity_function = vtk.vtkPiecewiseFunction()
+        opacity_function.AddPoint(0, 0.)
+        for label, color in _LABELS_COLORS.items():
+            color_function.AddRGBPoint(label, *color)
+            opacity_function.AddPoint(label, _LABELS_OPACITIES[label])
+
+        volume_property = vtk.vtkVolumeProperty()
+        volume_property.SetColor(color_function)
+        volume_property.SetScalarOpacity(opacity_function)
+        volume_property.SetInterpolationTypeToNearest()  # labels must not be interpolated
+        volume_property.ShadeOff()
+
+        self._volume_mapper = vtk.vtkSmartVolumeMapper()
+
+        self._volume = vtk.vtkVolume()
+        self._volume.SetMapper(self._volume_mapper)
+        self._volume.SetProperty(volume_property)
+        self._volume.SetUserMatrix(get_image_cube_matrix())
+
+    def set_render_mode(self, mode):
+        """
+        Set the cube representation
+
+        Parameters
+        ----------
+        mode : str
+            "points", "surface" or "volume"
+        """
+        if mode not in RENDER_MODES:
+            raise ValueError("Unknown render mode: {} (possible: {})".format(mode, ", ".join(RENDER_MODES)))
+        self._render_mode = mode
+
+    def get_render_mode(self):
+        return self._render_mode
+
+    def set_vertex_cube(self, cube_vtk_mesh):
+        """
+        Set the cube for the points mode
+
+        Parameters
+        ----------
+        cube_vtk_mesh : vtkUnstructuredGrid
+        """
+        self._points_mapper.SetInputData(cube_vtk_mesh)
+
+    def set_image_cube(self, cube_image):
+        """
+        Set the cube for the surface and volume modes
+
+        Parameters
+        ----------
+        cube_image : vtkImageData
+            voxels labels as scalars
+        """
+        self._surface_filter.SetInputData(cube_image)
+        self._volume_mapper.SetInputData(cube_image)
+
+    def get_prop(self):
+        """
+        Get the scene object of the current mode
+
+        Returns
+        -------
+        get_prop : vtkActor or vtkVolume
+        """
+        if self._render_mode == "points":
+            return self._points_actor
+        if self._render_mode == "surface":
+            return self._surface_actor
+        return self._volume
@@ -2,22 +2,22 @@ import vtk
 import numpy as np
 from vtk.qt.QVTKRenderWindowInteractor import QVTKRenderWindowInteractor
 from .vtk_widget.cube_widget import CubeWidget
+from CUDACubeFiles.engine.cube_representation import CubeRepresentation
 
 
 class VtkCubeScene(QVTKRenderWindowInteractor):
     def __init__(self, parent=None):
         QVTKRenderWindowInteractor.__init__(self, parent)
         
-        self._cube = vtk.vtkUnstructuredGrid()
-        self._cube_mapper = vtk.vtkDataSetMapper()
-        self._cube_actor = vtk.vtkActor()
+        self._cube_representation = CubeRepresentation()
+        self._cube_prop = None
 
         self._cube_widget = CubeWidget()
 
     def _initialize_scene(self):
-        self._cube_actor.SetMapper(self._cube_mapper)
         self._renderer.RemoveAllViewProps()
-        self._renderer.AddActor(self._cube_actor)
+        self._cube_prop = self._cube_representation.get_prop()
+        self._renderer.AddViewProp(self._cube_prop)
 
         self._cube_widget.set_renderer(self._renderer)
 
@@ -30,18 +30,48 @@ class VtkCubeScene(QVTKRenderWindowInteractor):
 
         self._initialize_scene()
 
+    def _update_cube_prop(self):
+        prop = self._cube_representation.get_prop()
+        if prop is not self._cube_prop:
+            self._renderer.RemoveViewProp(self._cube_prop)
+            self._renderer.AddViewProp(prop)
+            self._cube_prop = prop
+        self._interactor.Initialize()
+
+    def set_render_mode(self, mode):
+        """
+        Set cube representation mode
+
+        Parameters
+        ----------
+        mode : str
+            "points", "surface" or "volume" (see CubeRepresentation)
+        """
+        self._cube_representation.set_render_mode(mode)
+        self._update_cube_prop()
+
     def set_cube(self, cube_vtk_mesh):
         """
-        Set cube representation object
+        Set cube representation object (points mode)
 
         Parameters
         ----------
         cube_vtk_mesh : vtkUnstructuredGrid
         """
-        self._cube = cube_vtk_mesh
-        self._cube_mapper.SetInputData(self._cube)
+        self._cube_representation.set_vertex_cube(cube_vtk_mesh)
+        self._update_cube_prop()
 
-        self._interactor.Initialize()
+    def set_cube_image(self, cube_image):
+        """
+        Set cube representation object (surface and volume modes)
+
+        Parameters
+        ----------
+        cube_image : vtkImageData
+            voxels labels as scalars (see construct_image_cube)
+        """
+        self._cube_representation.set_image_cube(cube_image)
+        self._update_cube_prop()
 
     def set_cube_bounds(self, size):
         """
@@ -1,4 +1,13 @@
+import os
+import numpy as np
 from DiffuseFibrosis.fibrosis.fibrosis_integrator import FibrosisIntegrator
+from DiffuseFibrosis.fibrosis import fibrosis_realizations
+from CUDACubeFiles.binary_files import tnnp_cuda_files
+from CUDACubeFiles.cube_generator.cube_datasets import construct_image_cube
+from CUDACubeFiles.engine.cube_representation import RENDER_MODES
+
+
+FIBROSIS_PATTERNS = ("uniform", "exact", "correlated")
 
 
 class DiffFibrosisEngineManager:
@@ -7,6 +16,8 @@ class DiffFibrosisEngineManager:
 
         self._fibrosis_integrator = FibrosisIntegrator()
 
+        self._render_mode = "surface"  # see CubeRepresentation
+
     def connect_with_scene(self, vtk_scene):
         """
         Connect with the scene
@@ -45,17 +56,195 @@ class DiffFibrosisEngineManager:
             cube_array : numpy array
             fibers_array : numpy array
         """
-        self._fibrosis_integrator.set_cube_array(data_dict["cube_array"])
-        self._fibrosis_integrator.set_fibers_array(data_dict["fibers_array"])
+        # fibrosis is embedded in place, input arrays are shared with other packages:
+        self._fibrosis_integrator.set_cube_array(np.array(data_dict["cube_array"]))
+        self._fibrosis_integrator.set_fibers_array(np.array(data_dict["fibers_array"]))
+
+    def load_cube_files(self, directory, n_side=None):
+        """
+        Set existing heart.bin and fibers.bin files as input
+        (instead of the data from another package)
+
+        Parameters
+        ----------
+        directory : str
+            directory with heart.bin and fibers.bin files
+
+        n_side : int
+            cube side size, if None - defined by the files size
+        """
+        # copy-on-write: fibrosis embedding doesn't change the files
+        cube_array = tnnp_cuda_files.open_cube_points(
+            os.path.join(directory, tnnp_cuda_files.HEART_FILE_NAME), n_side, mode="c")
+        fibers_array = tnnp_cuda_files.open_fibers_angles(
+            os.path.join(directory, tnnp_cuda_files.FIBERS_FILE_NAME), len(cube_array), mode="c")
+        self._fibrosis_integrator.set_cube_array(cube_array)
+        self._fibrosis_integrator.set_fibers_array(fibers_array)
+
+    def embed_fibrosis(self, percent, pattern="uniform", correlation_length=2., seed=None):
+        """
+        Set percent of fibrosis in the left ventricle model without visualization
+
+        Parameters
+        ----------
+        percent : float
+
+        pattern : str
+            "uniform" - independent voxels (approximate percent),
+            "exact" - independent voxels, exact percent of the normal tissue voxels,
+            "correlated" - patches (see CorrelatedFibrosisGenerator)
+
+        correlation_length : float or list
+            patches size (voxels), correlated pattern only
+
+        seed : int
+            random if None
+
+        Returns
+        -------
+        embed_fibrosis : float
+            realized fraction of the fibrosis in the normal tissue
+        """
+        if pattern == "uniform":
+            return self._fibrosis_integrator.embed_uniform_points_fibrosis(percent, seed)
+        if pattern == "exact":
+            return self._fibrosis_integrator.embed_exact_uniform_fibrosis(percent, seed)
+        if pattern == "correlated":
+            if seed is None:
+                seed = int(np.random.SeedSequence().generate_state(1)[0])
+            return self._fibrosis_integrator.embed_correlated_fibrosis(percent, correlation_length, seed)
+        raise ValueError("Unknown fibrosis pattern: {} (possible: {})".format(pattern,
+                                                                              ", ".join(FIBROSIS_PATTERNS)))
 
-    def embed_uniform_points_fibrosis(self, percent):
+    def embed_uniform_points_fibrosis(self, percent, seed=None):
         """
         Set percent of fibrosis in the left ventricle model
 
         Parameters
         ----------
         percent : float
+
+        seed : int
+            random if None
+
+        Returns
+        -------
+        embed_uniform_points_fibrosis : float
+            realized fraction of the fibrosis in the normal tissue
+        """
+        fraction = self.embed_fibrosis(percent, seed=seed)
+        self.visualize_cube()
+        return fraction
+
+    def embed_exact_uniform_fibrosis(self, percent, seed=None):
+        """
+        Set exact percent of fibrosis in the normal tissue of the left ventricle model
+
+        Parameters
+        ----------
+        percent : float
+
+        seed : int
+            random if None
+
+        Returns
+        -------
+        embed_exact_uniform_fibrosis : float
+            realized fraction of the fibrosis in the normal tissue
+        """
+        fraction = self.embed_fibrosis(percent, "exact", seed=seed)
+        self.visualize_cube()
+        return fraction
+
+    def embed_correlated_fibrosis(self, percent, correlation_length, seed=None):
+        """
+        Set percent of patchy fibrosis in the left ventricle model
+
+        Parameters
+        ----------
+        percent : float
+
+        correlation_length : float
+            patches size (voxels)
+
+        seed : int
+            random if None
+
+        Returns
+        -------
+        embed_correlated_fibrosis : float
+            realized fraction of the fibrosis in the normal tissue
+        """
+        fraction = self.embed_fibrosis(percent, "correlated", correlation_length, seed)
+        self.visualize_cube()
+        return fraction
+
+    def write_realizations(self, output_directory, specs, workers=1):
+        """
+        Write fibrosis realizations of the current cube in parallel (see fibrosis_realizations),
+        the cube isn't changed. The cube files are written to output_directory/base
+        and shared by the processes, every realization gets it's own directory
+
+        Parameters
+        ----------
+        output_directory : str
+
+        specs : list
+            (percent, seed, pattern) of every realization (see get_realization_spec)
+
+        workers : int
+            number of processes
+
+        Returns
+        -------
+        write_realizations : generator
+            [spec, result, error] (see fibrosis_realizations.write_realizations)
+        """
+        base_directory = os.path.join(output_directory, "base")
+        os.makedirs(base_directory, exist_ok=True)
+        tnnp_cuda_files.write_cube_points(os.path.join(base_directory, tnnp_cuda_files.HEART_FILE_NAME),
+                                          self._fibrosis_integrator.get_cube_array(), tissue_label=1)
+        tnnp_cuda_files.write_fibers_angles(os.path.join(base_directory, tnnp_cuda_files.FIBERS_FILE_NAME),
+                                            self._fibrosis_integrator.get_fibers_array())
+        return fibrosis_realizations.write_realizations(base_directory, output_directory, specs, workers)
+
+    def visualize_cube(self):
+        """
+        Display the left ventricle cube on the scene in the current render mode
+        (points mode shows the normal tissue only, surface and volume - normal tissue and fibrosis)
+        """
+        if self._fibrosis_integrator.get_cube_array().ndim != 3:
+            return  # cube wasn't set yet
+        if self._render_mode == "points":
+            self._fibrosis_integrator.construct_cube()
+            self._vtk_scene.set_lv_cube(self._fibrosis_integrator.get_cube())
+        else:
+            self._vtk_scene.set_lv_cube_image(construct_image_cube(self._fibrosis_integrator.get_cube_array()))
+        self._vtk_scene.set_render_mode(self._render_mode)
+
+    def set_render_mode(self, mode):
+        """
+        Set the cube representation on the scene
+
+        Parameters
+        ----------
+        mode : str
+            "points" (vertices), "surface" or "volume" (image data, see CubeRepresentation)
+        """
+        if mode not in RENDER_MODES:
+            raise ValueError("Unknown render mode: {} (possible: {})".format(mode, ", ".join(RENDER_MODES)))
+        self._render_mode = mode
+
+    def get_arrays(self):
+        """
+        Get cube array with fibrosis and corresponding fibers as dict
+
+        Returns
+        -------
+        get_arrays : dict
+            keys:
+            cube_array : numpy array
+            fibers_array : numpy array
         """
-        self._fibrosis_integrator.embed_uniform_points_fibrosis(percent)
-        self._fibrosis_integrator.construct_cube()
-        self._vtk_scene.set_lv_cube(self._fibrosis_integrator.get_cube())
+        return {"cube_array": self._fibrosis_integrator.get_cube_array(),
+                "fibers_array": self._fibrosis_integrator.get_fibers_array()}
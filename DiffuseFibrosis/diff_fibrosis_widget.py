@@ -11,6 +11,7 @@ class DiffFibrosisWidget(QtWidgets.QWidget):
 
         self._initialize_uniform_points_widget()
         self._initialize_uniform_twigs_widget()
+        self._initialize_correlated_patches_widget()
         self._initialize_distribution_box()
         self._initialize_control_box()
         self._initialize_panel_widget()
@@ -27,8 +28,11 @@ class DiffFibrosisWidget(QtWidgets.QWidget):
         self._storage_regist_key = "DiffFibrosis"
 
     def _set_connections(self):
-        self._generate_button.clicked.connect(self.embed_uniform_point_distribution)
+        self._generate_button.clicked.connect(self.embed_fibrosis)
+        self._distribution_combobox.currentIndexChanged.connect(self.set_distribution_widget)
         self._update_button.clicked.connect(self.get_cube_arrays)
+        self._load_button.clicked.connect(self.load_cube_files)
+        self._render_mode_combobox.currentIndexChanged.connect(self.set_render_mode)
 
     def _initialize_uniform_points_widget(self):
         self._uniform_points_widget = QtWidgets.QWidget(self)
@@ -39,8 +43,18 @@ class DiffFibrosisWidget(QtWidgets.QWidget):
         self._uniform_points_percent_edit.setAlignment(QtCore.Qt.AlignCenter)
         self._uniform_points_percent_edit.setText("0")
 
+        self._uniform_points_exact_checkbox = QtWidgets.QCheckBox("Exact", self)
+        self._uniform_points_exact_checkbox.setToolTip("Exact percent of the tissue voxels")
+        self._uniform_points_seed_label = QtWidgets.QLabel("Seed: ", self)
+        self._uniform_points_seed_edit = QtWidgets.QLineEdit(self)
+        self._uniform_points_seed_edit.setAlignment(QtCore.Qt.AlignCenter)
+        self._uniform_points_seed_edit.setPlaceholderText("random")
+
         self._uniform_points_layer.addWidget(self._uniform_points_percent_label, 0, 0)
-        self._uniform_points_layer.addWidget(self._uniform_points_percent_edit)
+        self._uniform_points_layer.addWidget(self._uniform_points_percent_edit, 0, 1)
+        self._uniform_points_layer.addWidget(self._uniform_points_exact_checkbox, 1, 0)
+        self._uniform_points_layer.addWidget(self._uniform_points_seed_label, 2, 0)
+        self._uniform_points_layer.addWidget(self._uniform_points_seed_edit, 2, 1)
 
         self._uniform_points_widget.setLayout(self._uniform_points_layer)
 
@@ -60,14 +74,45 @@ class DiffFibrosisWidget(QtWidgets.QWidget):
 
         self._uniform_twigs_widget.setLayout(self._uniform_twigs_layer)
 
+    def _initialize_correlated_patches_widget(self):
+        self._correlated_patches_widget = QtWidgets.QWidget(self)
+        self._correlated_patches_layer = QtWidgets.QGridLayout()
+
+        self._correlated_patches_percent_label = QtWidgets.QLabel("Percent: ", self)
+        self._correlated_patches_percent_edit = QtWidgets.QLineEdit(self)
+        self._correlated_patches_percent_edit.setAlignment(QtCore.Qt.AlignCenter)
+        self._correlated_patches_percent_edit.setText("0")
+        self._correlated_patches_length_label = QtWidgets.QLabel("Length: ", self)
+        self._correlated_patches_length_edit = QtWidgets.QLineEdit(self)
+        self._correlated_patches_length_edit.setAlignment(QtCore.Qt.AlignCenter)
+        self._correlated_patches_length_edit.setText("2")
+        self._correlated_patches_seed_label = QtWidgets.QLabel("Seed: ", self)
+        self._correlated_patches_seed_edit = QtWidgets.QLineEdit(self)
+        self._correlated_patches_seed_edit.setAlignment(QtCore.Qt.AlignCenter)
+        self._correlated_patches_seed_edit.setText("0")
+        self._correlated_patches_seed_edit.setPlaceholderText("random")
+
+        self._correlated_patches_layer.addWidget(self._correlated_patches_percent_label, 0, 0)
+        self._correlated_patches_layer.addWidget(self._correlated_patches_percent_edit, 0, 1)
+        self._correlated_patches_layer.addWidget(self._correlated_patches_length_label, 1, 0)
+        self._correlated_patches_layer.addWidget(self._correlated_patches_length_edit, 1, 1)
+        self._correlated_patches_layer.addWidget(self._correlated_patches_seed_label, 2, 0)
+        self._correlated_patches_layer.addWidget(self._correlated_patches_seed_edit, 2, 1)
+
+        self._correlated_patches_widget.setLayout(self._correlated_patches_layer)
+
     def _initialize_distribution_box(self):
         self._distribution_box = QtWidgets.QGroupBox("Fibrosis distribution", self)
 
         self._distribution_combobox = QtWidgets.QComboBox(self)
         self._distribution_combobox.addItem("Uniform Points")
+        self._distribution_combobox.addItem("Correlated Patches")
         self._distribution_stack = QtWidgets.QStackedWidget(self)
         self._distribution_stack.addWidget(self._uniform_points_widget)
         self._distribution_stack.addWidget(self._uniform_twigs_widget)
+        self._distribution_stack.addWidget(self._correlated_patches_widget)
+        # combobox items widgets (uniform twigs are not implemented):
+        self._distribution_widgets = [self._uniform_points_widget, self._correlated_patches_widget]
 
         self._distribution_layer = QtWidgets.QGridLayout()
         self._distribution_layer.addWidget(self._distribution_combobox, 0, 0, 1, 2)
@@ -82,12 +127,22 @@ class DiffFibrosisWidget(QtWidgets.QWidget):
         self._upload_button = QtWidgets.QPushButton("Upload", self)
         self._generate_button = QtWidgets.QPushButton("Generate", self)
         self._export_button = QtWidgets.QPushButton("Export", self)
+        self._load_button = QtWidgets.QPushButton("Load", self)
+
+        self._render_mode_combobox = QtWidgets.QComboBox(self)
+        self._render_mode_combobox.addItems(["Surface", "Volume", "Points"])
+
+        self._fraction_label = QtWidgets.QLabel(self)
+        self._fraction_label.setAlignment(QtCore.Qt.AlignCenter)
 
         self._control_layer = QtWidgets.QGridLayout()
         self._control_layer.addWidget(self._update_button, 0, 0)
         self._control_layer.addWidget(self._upload_button, 0, 1)
         self._control_layer.addWidget(self._generate_button, 1, 0)
         self._control_layer.addWidget(self._export_button, 1, 1)
+        self._control_layer.addWidget(self._load_button, 2, 0)
+        self._control_layer.addWidget(self._render_mode_combobox, 2, 1)
+        self._control_layer.addWidget(self._fraction_label, 3, 0, 1, 2)
 
         self._control_box.setLayout(self._control_layer)
 
@@ -118,9 +173,47 @@ class DiffFibrosisWidget(QtWidgets.QWidget):
     def start_vtk_scene(self):
         self._engine_manager.run_the_scene()
 
+    def set_distribution_widget(self, index):
+        self._distribution_stack.setCurrentWidget(self._distribution_widgets[index])
+
+    def embed_fibrosis(self):
+        if self._distribution_combobox.currentIndex() == 1:
+            self.embed_correlated_patches_distribution()
+        else:
+            self.embed_uniform_point_distribution()
+
     def embed_uniform_point_distribution(self):
-        self._engine_manager.embed_uniform_points_fibrosis(float(self._uniform_points_percent_edit.text()))
+        percent = float(self._uniform_points_percent_edit.text())
+        seed_text = self._uniform_points_seed_edit.text().strip()
+        seed = int(seed_text) if seed_text else None
+        if self._uniform_points_exact_checkbox.isChecked():
+            fraction = self._engine_manager.embed_exact_uniform_fibrosis(percent, seed)
+        else:
+            fraction = self._engine_manager.embed_uniform_points_fibrosis(percent, seed)
+        self.set_fraction_label(fraction)
+
+    def embed_correlated_patches_distribution(self):
+        seed_text = self._correlated_patches_seed_edit.text().strip()
+        fraction = self._engine_manager.embed_correlated_fibrosis(float(self._correlated_patches_percent_edit.text()),
+                                                                  float(self._correlated_patches_length_edit.text()),
+                                                                  int(seed_text) if seed_text else None)
+        self.set_fraction_label(fraction)
+
+    def set_fraction_label(self, fraction):
+        if fraction is None:
+            self._fraction_label.clear()
+        else:
+            self._fraction_label.setText("Fibrosis: {:.4f} % of tissue".format(100.*fraction))
+
+    def set_render_mode(self):
+        self._engine_manager.set_render_mode(self._render_mode_combobox.currentText().lower())
+        self._engine_manager.visualize_cube()
 
     def get_cube_arrays(self):
         data_dict = self._local_storage.get_access(self._storage_regist_key)
         self._engine_manager.set_data_dict(data_dict)
+
+    def load_cube_files(self):
+        directory = QtWidgets.QFileDialog.getExistingDirectory(self, "Directory with heart.bin and fibers.bin")
+        if directory:
+            self._engine_manager.load_cube_files(directory)
@@ -1,14 +1,14 @@
 import vtk
 from vtk.qt.QVTKRenderWindowInteractor import QVTKRenderWindowInteractor
+from CUDACubeFiles.engine.cube_representation import CubeRepresentation
 
 
 class VtkDiffFibrosisScene(QVTKRenderWindowInteractor):
     def __init__(self, parent=None):
         QVTKRenderWindowInteractor.__init__(self, parent)
 
-        self._lv_cube = vtk.vtkUnstructuredGrid()
-        self._lv_cube_mapper = vtk.vtkDataSetMapper()
-        self._lv_cube_actor = vtk.vtkActor()
+        self._lv_cube_representation = CubeRepresentation()
+        self._lv_cube_prop = None
 
     def initialize_window(self):
         self._renderer = vtk.vtkRenderer()
@@ -19,20 +19,50 @@ class VtkDiffFibrosisScene(QVTKRenderWindowInteractor):
 
         self._initialize_scene()
 
+    def _update_lv_cube_prop(self):
+        prop = self._lv_cube_representation.get_prop()
+        if prop is not self._lv_cube_prop:
+            self._renderer.RemoveViewProp(self._lv_cube_prop)
+            self._renderer.AddViewProp(prop)
+            self._lv_cube_prop = prop
+        self._interactor.Initialize()
+
+    def set_render_mode(self, mode):
+        """
+        Set the left ventricle cube representation mode
+
+        Parameters
+        ----------
+        mode : str
+            "points", "surface" or "volume" (see CubeRepresentation)
+        """
+        self._lv_cube_representation.set_render_mode(mode)
+        self._update_lv_cube_prop()
+
     def set_lv_cube(self, cube_vtk_mesh):
         """
-        Set the left ventricle mesh (in cube representation)
+        Set the left ventricle mesh (in cube representation, points mode)
 
         Parameters
         ----------
         cube_vtk_mesh : vtkUnstructuredGrid object
         """
-        self._lv_cube = cube_vtk_mesh
-        self._lv_cube_mapper.SetInputData(self._lv_cube)
+        self._lv_cube_representation.set_vertex_cube(cube_vtk_mesh)
+        self._update_lv_cube_prop()
 
-        self._interactor.Initialize()
+    def set_lv_cube_image(self, cube_image):
+        """
+        Set the left ventricle cube with the tissue labels (surface and volume modes)
+
+        Parameters
+        ----------
+        cube_image : vtkImageData
+            voxels labels as scalars (see construct_image_cube)
+        """
+        self._lv_cube_representation.set_image_cube(cube_image)
+        self._update_lv_cube_prop()
 
     def _initialize_scene(self):
-        self._lv_cube_actor.SetMapper(self._lv_cube_mapper)
         self._renderer.RemoveAllViewProps()
-        self._renderer.AddActor(self._lv_cube_actor)
+        self._lv_cube_prop = self._lv_cube_representation.get_prop()
+        self._renderer.AddViewProp(self._lv_cube_prop)
@@ -0,0 +1,215 @@
+import numpy as np
+from scipy import fft
+from DiffuseFibrosis.fibrosis.tissue_voxels import get_tissue_chunks, get_fibrosis_number, label_tissue_voxels
+
+
+class CorrelatedFibrosisGenerator:
+    """
+    Patchy fibrosis from a spatially correlated gaussian random field:
+    white noise is filtered (FFT convolution) by the gaussian kernel with the correlation length
+    and the tissue voxels with the largest field values become fibrosis (exact number of voxels).
+
+    The field is computed by chunks of the cube planes (first array axis) with the kernel radius halo,
+    the noise of every plane is generated by it's own seeded generator, so the field
+    doesn't depend on the chunk size (up to the float rounding) and the same seed gives the same pattern
+    """
+    def __init__(self):
+        self._correlation_length = [2., 2., 2.]  # gaussian kernel sigma along the cube axes (voxels)
+        self._truncation = 4.  # kernel radius in sigmas
+        self._seed = 0
+        self._chunk_planes = 32
+
+    def set_correlation_length(self, correlation_length):
+        """
+        Set the size of the fibrosis patches
+
+        Parameters
+        ----------
+        correlation_length : float or list
+            gaussian kernel sigma (voxels), 3 values - along every cube axis
+            (elongated patches), 0 - not correlated (independent voxels)
+        """
+        correlation_length = np.broadcast_to(np.asarray(correlation_length, dtype=float), (3,))
+        if np.any(correlation_length < 0):
+            raise ValueError("Correlation length must be non negative")
+        self._correlation_length = list(correlation_length)
+
+    def set_seed(self, seed):
+        """
+        Set the random generator seed
+
+        Parameters
+        ----------
+        seed : int
+            non negative
+        """
+        self._seed = seed
+
+    def set_chunk_planes(self, planes_number):
+        """
+        Set number of the cube planes computed at once (memory usage)
+
+        Parameters
+        ----------
+        planes_number : int
+        """
+        self._chunk_planes = max(1, int(planes_number))
+
+    def get_kernel_radius(self):
+        """
+        Get the kernel radius along the cube axes (halo size of the chunks)
+
+        Returns
+        -------
+        get_kernel_radius : list
+            voxels
+        """
+        return [int(np.ceil(self._truncation*sigma)) for sigma in self._correlation_length]
+
+    def _get_kernel(self, sigma, radius):
+        if radius == 0:
+            return np.ones(1)
+        x = np.arange(-radius, radius + 1)
+        kernel = np.exp(-x**2/(2.*sigma**2))
+        return kernel/kernel.sum()
+
+    def _get_transfer_function(self, fft_shape):
+        # separable kernel: product of the 1d kernels spectra
+        transfer_function = None
+        for axis, (sigma, radius) in enumerate(zip(self._correlation_length, self.get_kernel_radius())):
+            kernel = self._get_kernel(sigma, radius)
+            if axis == 2:
+                spectrum = fft.rfft(kernel, fft_shape[axis])
+            else:
+                spectrum = fft.fft(kernel, fft_shape[axis])
+            shape = [1, 1, 1]
+            shape[axis] = len(spectrum)
+            spectrum = spectrum.reshape(shape).astype(np.complex64)
+            transfer_function = spectrum if transfer_function is None else transfer_function*spectrum
+        return transfer_function
+
+    def _get_noise_planes(self, first_plane, last_plane, plane_shape):
+        # plane index is shifted by the halo to be non negative:
+        radius = self.get_kernel_radius()[0]
+        planes = np.empty((last_plane - first_plane, ) + plane_shape, dtype=np.float32)
+        for i, plane in enumerate(range(first_plane, last_plane)):
+            generator = np.random.default_rng([self._seed, plane + radius])
+            planes[i] = generator.standard_normal(plane_shape, dtype=np.float32)
+        return planes
+
+    def compute_field_chunks(self, shape):
+        """
+        Compute the correlated field by chunks
+
+        Parameters
+        ----------
+        shape : tuple
+            cube shape (n0, n1, n2)
+
+        Returns
+        -------
+        compute_field_chunks : generator
+            [start, stop, field] - field of the planes [start, stop) of the cube, float32
+        """
+        radius = self.get_kernel_radius()
+        plane_shape = (shape[1] + 2*radius[1], shape[2] + 2*radius[2])
+
+        transfer_functions = {}
+        for start in range(0, shape[0], self._chunk_planes):
+            stop = min(start + self._chunk_planes, shape[0])
+            noise = self._get_noise_planes(start - radius[0], stop + radius[0], plane_shape)
+
+            # linear (not circular) convolution: the noise is padded by the kernel size
+            fft_shape = tuple(fft.next_fast_len(noise.shape[axis] + 2*radius[axis], real=True) for axis in range(3))
+            if fft_shape not in transfer_functions:
+                transfer_functions[fft_shape] = self._get_transfer_function(fft_shape)
+
+            spectrum = fft.rfftn(noise, fft_shape)
+            spectrum *= transfer_functions[fft_shape]
+            field = fft.irfftn(spectrum, fft_shape)
+            yield [start, stop, field[2*radius[0]:2*radius[0] + stop - start,
+                                      2*radius[1]:2*radius[1] + shape[1],
+                                      2*radius[2]:2*radius[2] + shape[2]]]
+
+    def select(self, cube_array, chunks, fibrosis_number, tissue_label=1):
+        """
+        Select the tissue voxels with the largest field values (exact number)
+
+        Parameters
+        ----------
+        cube_array : numpy array
+            (n0, n1, n2), voxels labels, not changed (can be read-only)
+
+        chunks : list
+            see get_tissue_chunks, with the chunk_planes of the generator
+
+        fibrosis_number : int
+            see get_fibrosis_number
+
+        tissue_label : int
+
+        Returns
+        -------
+        select : generator
+            bool mask of the selected voxels among the tissue voxels of every chunk (see label_tissue_voxels)
+        """
+        tissue_number = sum(count for _, _, count in chunks)
+
+        # field values of the tissue voxels (in the cube order):
+        values = np.empty(tissue_number, dtype=np.float32)
+        offset = 0
+        for (start, stop, field), (_, _, count) in zip(self.compute_field_chunks(cube_array.shape), chunks):
+            values[offset:offset + count] = field[cube_array[start:stop] == tissue_label]
+            offset += count
+
+        threshold = np.partition(values, tissue_number - fibrosis_number)[tissue_number - fibrosis_number]
+        # values equal to the threshold are taken in the cube order until the exact number:
+        equal_number = fibrosis_number - np.count_nonzero(values > threshold)
+
+        offset = 0
+        for _, _, count in chunks:
+            chunk_values = values[offset:offset + count]
+            offset += count
+
+            selected = chunk_values > threshold
+            if equal_number > 0:
+                equal = np.flatnonzero(chunk_values == threshold)[:equal_number]
+                selected[equal] = True
+                equal_number -= len(equal)
+            yield selected
+
+    def embed(self, cube_array, fibers_array, percent, tissue_label=1, fibrosis_label=2):
+        """
+        Embed the fibrosis to the cube (in place): the tissue voxels with the largest field values
+        are labeled as fibrosis, their fibers are set to 0
+
+        Parameters
+        ----------
+        cube_array : numpy array
+            (n0, n1, n2), voxels labels
+
+        fibers_array : numpy array
+            (3, n0, n1, n2)
+
+        percent : float
+            percent of the tissue voxels to become fibrosis
+
+        tissue_label : int
+
+        fibrosis_label : int
+
+        Returns
+        -------
+        embed : float
+            realized fraction of the fibrosis voxels in the tissue
+        """
+        chunks = get_tissue_chunks(cube_array, self._chunk_planes, tissue_label)
+        fibrosis_number, tissue_number = get_fibrosis_number(chunks, percent)
+        if fibrosis_number == 0:
+            return 0.
+
+        # field values are taken from the whole cube before the first chunk is selected:
+        for (start, stop, _), selected in zip(chunks, self.select(cube_array, chunks, fibrosis_number, tissue_label)):
+            label_tissue_voxels(cube_array, fibers_array, start, stop, selected, tissue_label, fibrosis_label)
+
+        return fibrosis_number/tissue_number
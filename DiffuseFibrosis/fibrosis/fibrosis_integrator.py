@@ -1,6 +1,9 @@
 import vtk
-import struct
 import numpy as np
+from CUDACubeFiles.binary_files import tnnp_cuda_files
+from CUDACubeFiles.cube_generator.cube_datasets import construct_vertex_cube
+from DiffuseFibrosis.fibrosis.correlated_fibrosis import CorrelatedFibrosisGenerator
+from DiffuseFibrosis.fibrosis.tissue_voxels import embed_uniform_fibrosis, embed_exact_uniform_fibrosis
 
 
 class FibrosisIntegrator:
@@ -11,8 +14,6 @@ class FibrosisIntegrator:
         self._cube_array = np.array([])
         self._fibers_array = np.array([])
 
-        self._SCALE_CHAR = 127.0
-
     def set_cube_array(self, cube_array):
         """
 
@@ -28,44 +29,97 @@ class FibrosisIntegrator:
         Parameters
         ----------
         fibers_array : numpy array
+            (3, n, n, n), int8 - fibers components as signed char codes
+            (see CubeGenerator.get_fibers)
         """
         self._fibers_array = fibers_array
 
-    def embed_uniform_points_fibrosis(self, percent):
-        mask = np.random.rand(*self._cube_array.shape) <= percent/100.
-        self._cube_array[np.logical_and(mask, self._cube_array)] = 2  # 0 - no tissue, 1 - normal, 2 - fibrosis
-        self._fibers_array[:, mask] = self._float_to_char(0)
+    def embed_uniform_points_fibrosis(self, percent, seed=None):
+        """
+        Embed fibrosis to the normal tissue voxels independently with the probability of percent
+        (see tissue_voxels.embed_uniform_fibrosis)
+
+        Parameters
+        ----------
+        percent : float
+
+        seed : int
+            random if None
+
+        Returns
+        -------
+        embed_uniform_points_fibrosis : float
+            realized fraction of the fibrosis voxels in the normal tissue
+        """
+        fraction = embed_uniform_fibrosis(self._cube_array, self._fibers_array, percent, seed)
 
         self.write_bin_files()
+        return fraction
 
-    def construct_cube(self):
+    def embed_exact_uniform_fibrosis(self, percent, seed=None):
         """
-        Build left ventricle in cube as vtkUnstructuredGrid to represent on the scene
+        Embed fibrosis to exact percent of the normal tissue voxels (sampled uniformly among them,
+        see tissue_voxels.embed_exact_uniform_fibrosis)
+
+        Parameters
+        ----------
+        percent : float
+
+        seed : int
+            random if None
+
+        Returns
+        -------
+        embed_exact_uniform_fibrosis : float
+            realized fraction of the fibrosis voxels in the normal tissue
         """
-        self._cube = vtk.vtkUnstructuredGrid()
+        fraction = embed_exact_uniform_fibrosis(self._cube_array, self._fibers_array, percent, seed)
 
-        points = vtk.vtkPoints()
+        self.write_bin_files()
+        return fraction
+
+    def embed_correlated_fibrosis(self, percent, correlation_length=2., seed=0):
+        """
+        Embed patchy fibrosis (see CorrelatedFibrosisGenerator): exact percent of the normal tissue voxels
+
+        Parameters
+        ----------
+        percent : float
 
-        cube_side = len(self._cube_array)
+        correlation_length : float or list
+            patches size (voxels), 3 values - along every cube axis
 
-        ii = 0
-        for i in range(cube_side):
-            for j in range(cube_side):
-                for k in range(cube_side):
-                    if self._cube_array[i][j][k] == 1:
-                        points.InsertPoint(ii, i, j, k)
-                        vertex = vtk.vtkVertex()
-                        vertex.GetPointIds().SetId(0, ii)
-                        self._cube.InsertNextCell(vertex.GetCellType(), vertex.GetPointIds())
-                        ii += 1
+        seed : int
+            same seed gives the same pattern
 
-        self._cube.SetPoints(points)
+        Returns
+        -------
+        embed_correlated_fibrosis : float
+            realized fraction of the fibrosis voxels in the normal tissue
+        """
+        generator = CorrelatedFibrosisGenerator()
+        generator.set_correlation_length(correlation_length)
+        generator.set_seed(seed)
+        fraction = generator.embed(self._cube_array, self._fibers_array, percent)
+
+        self.write_bin_files()
+        return fraction
+
+    def construct_cube(self):
+        """
+        Build left ventricle in cube as vtkUnstructuredGrid to represent on the scene
+        (normal tissue only, fibrosis voxels are not shown)
+        """
+        self._cube = construct_vertex_cube(self._cube_array, label=1)
 
     def get_cube(self):
         return self._cube
 
-    def _float_to_char(self, value):
-        return struct.pack("b", (int(value*self._SCALE_CHAR + 0.5)))  # magic for TNNP-CUDA program
+    def get_cube_array(self):
+        return self._cube_array
+
+    def get_fibers_array(self):
+        return self._fibers_array
 
     def write_cube_points(self, file_name):
         """
@@ -75,8 +129,7 @@ class FibrosisIntegrator:
         ----------
         file_name : str
         """
-        char_array = np.where(self._cube_array == 1, chr(1), chr(0))
-        char_array.tofile(file_name)
+        tnnp_cuda_files.write_cube_points(file_name, self._cube_array, tissue_label=1)
 
     def write_fibers_angles(self, file_name):
         """
@@ -86,8 +139,8 @@ class FibrosisIntegrator:
         ----------
         file_name : str
         """
-        self._fibers_array.tofile(file_name)
+        tnnp_cuda_files.write_fibers_angles(file_name, self._fibers_array)
 
     def write_bin_files(self):
-        self.write_cube_points("heart.bin")
-        self.write_fibers_angles("fibers.bin")
+        self.write_cube_points(tnnp_cuda_files.HEART_FILE_NAME)
+        self.write_fibers_angles(tnnp_cuda_files.FIBERS_FILE_NAME)
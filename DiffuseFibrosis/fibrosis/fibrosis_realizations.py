@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from CUDACubeFiles.binary_files import tnnp_cuda_files
+from DiffuseFibrosis.fibrosis.correlated_fibrosis import CorrelatedFibrosisGenerator
+from DiffuseFibrosis.fibrosis.tissue_voxels import get_tissue_chunks, get_fibrosis_number, label_tissue_voxels, \
+    select_uniform_voxels, select_exact_uniform_voxels
+
+
+# Fibrosis realizations of the same base cube (heart.bin and fibers.bin directory, normal tissue only).
+# The base files are opened read-only as memory-mapped arrays, so the processes share them,
+# every realization is streamed by chunks of planes to it's own directory (heart.bin, fibers.bin, fibrosis.json).
+
+REALIZATION_FILE_NAME = "fibrosis.json"
+
+
+def get_realization_spec(spec):
+    """
+    Get the realization spec as dict
+
+    Parameters
+    ----------
+    spec : list or dict
+        (percent, seed, pattern) or (percent, seed, pattern, correlation_length) or dict with these keys
+        (and optional name - directory name of the realization)
+
+    Returns
+    -------
+    get_realization_spec : dict
+        keys: percent, seed, pattern, correlation_length, name
+    """
+    if not isinstance(spec, dict):
+        spec = dict(zip(["percent", "seed", "pattern", "correlation_length"], spec))
+    spec = dict({"seed": None, "pattern": "exact", "correlation_length": 2.}, **spec)
+    if spec["seed"] is None:
+        # realizations must be reproducible:
+        spec["seed"] = int(np.random.SeedSequence().generate_state(1)[0])
+    if not spec.get("name"):
+        spec["name"] = "{}_{:g}_{}".format(spec["pattern"], spec["percent"], spec["seed"])
+    return spec
+
+
+def _select_fibrosis(cube_array, chunks, spec, chunk_planes):
+    fibrosis_number, _ = get_fibrosis_number(chunks, spec["percent"])
+    if spec["pattern"] == "uniform":
+        return select_uniform_voxels(chunks, spec["percent"], spec["seed"])
+    if spec["pattern"] == "exact":
+        return select_exact_uniform_voxels(chunks, fibrosis_number, spec["seed"])
+    if spec["pattern"] == "correlated":
+        generator = CorrelatedFibrosisGenerator()
+        generator.set_correlation_length(spec["correlation_length"])
+        generator.set_seed(spec["seed"])
+        generator.set_chunk_planes(chunk_planes)
+        if fibrosis_number == 0:
+            return (np.array([], dtype=int) for _ in chunks)
+        return generator.select(cube_array, chunks, fibrosis_number)
+    raise ValueError("Unknown fibrosis pattern: {}".format(spec["pattern"]))
+
+
+def write_realization(base_directory, output_directory, spec, chunk_planes=32):
+    """
+    Embed fibrosis to the base cube and write the result to output_directory/name,
+    the base files are not changed
+
+    Parameters
+    ----------
+    base_directory : str
+        directory with heart.bin and fibers.bin files
+
+    output_directory : str
+
+    spec : list or dict
+        see get_realization_spec
+
+    chunk_planes : int
+        cube planes number processed at once (memory usage)
+
+    Returns
+    -------
+    write_realization : dict
+        spec keys and: directory, tissue_voxels, fibrosis_voxels, fraction (realized fraction
+        of the fibrosis in the tissue), time
+    """
+    start_time = time.time()
+    spec = get_realization_spec(spec)
+
+    cube_array = tnnp_cuda_files.open_cube_points(
+        os.path.join(base_directory, tnnp_cuda_files.HEART_FILE_NAME), mode="r")
+    fibers_array = tnnp_cuda_files.open_fibers_angles(
+        os.path.join(base_directory, tnnp_cuda_files.FIBERS_FILE_NAME), len(cube_array), mode="r")
+
+    chunks = get_tissue_chunks(cube_array, chunk_planes)
+    selections = _select_fibrosis(cube_array, chunks, spec, chunk_planes)
+
+    realization_directory = os.path.join(output_directory, spec["name"])
+    os.makedirs(realization_directory, exist_ok=True)
+    heart_file_name = os.path.join(realization_directory, tnnp_cuda_files.HEART_FILE_NAME)
+    fibers_file_name = os.path.join(realization_directory, tnnp_cuda_files.FIBERS_FILE_NAME)
+
+    # temporary files are replaced at the end, so an interrupted realization isn't taken for a complete one:
+    heart_output = tnnp_cuda_files.open_cube_points(heart_file_name + ".tmp", len(cube_array), mode="w+")
+    fibers_output = tnnp_cuda_files.open_fibers_angles(fibers_file_name + ".tmp", len(cube_array), mode="w+")
+
+    fibrosis_number = 0
+    for (start, stop, _), selected in zip(chunks, selections):
+        chunk_cube = np.array(cube_array[start:stop])
+        chunk_fibers = np.array(fibers_array[:, start:stop])
+        label_tissue_voxels(chunk_cube, chunk_fibers, 0, stop - start, selected)
+
+        heart_output[start:stop] = chunk_cube == 1
+        fibers_output[:, start:stop] = chunk_fibers
+        fibrosis_number += int(np.count_nonzero(chunk_cube == 2))
+
+    heart_output.flush()
+    fibers_output.flush()
+    del heart_output, fibers_output
+    os.replace(heart_file_name + ".tmp", heart_file_name)
+    os.replace(fibers_file_name + ".tmp", fibers_file_name)
+
+    tissue_number = sum(count for _, _, count in chunks)
+    result = dict(spec,
+                  directory=realization_directory,
+                  tissue_voxels=tissue_number,
+                  fibrosis_voxels=fibrosis_number,
+                  fraction=fibrosis_number/tissue_number if tissue_number else 0.)
+    with open(os.path.join(realization_directory, REALIZATION_FILE_NAME), "w") as json_file:
+        json.dump(result, json_file, indent=4)
+
+    result["time"] = time.time() - start_time
+    return result
+
+
+def write_realizations(base_directory, output_directory, specs, workers=1, chunk_planes=32):
+    """
+    Write the fibrosis realizations in parallel, yields the results as they are completed
+
+    Parameters
+    ----------
+    base_directory : str
+        directory with heart.bin and fibers.bin files
+
+    output_directory : str
+
+    specs : list
+        realizations specs (see get_realization_spec)
+
+    workers : int
+        number of processes
+
+    chunk_planes : int
+        see write_realization
+
+    Returns
+    -------
+    write_realizations : generator
+        [spec, result, error] - result is None if the realization failed
+    """
+    specs = [get_realization_spec(spec) for spec in specs]
+    names = [spec["name"] for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError("Realizations names must be unique")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(write_realization, base_directory, output_directory, spec, chunk_planes): spec
+                   for spec in specs}
+        for future in as_completed(futures):
+            try:
+                yield [futures[future], future.result(), None]
+            except Exception as error:
+                yield [futures[future], None, error]
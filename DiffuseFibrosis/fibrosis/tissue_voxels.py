@@ -0,0 +1,225 @@
+import numpy as np
+
+
+# Tissue voxels of the cube are processed by chunks of planes (first array axis),
+# so no temporary arrays of the full cube size are created.
+# Voxels of a chunk are numbered in the cube (C) order.
+
+
+def get_tissue_chunks(cube_array, chunk_planes=32, tissue_label=1):
+    """
+    Split the cube into chunks of planes and count the tissue voxels
+
+    Parameters
+    ----------
+    cube_array : numpy array
+        (n0, n1, n2), voxels labels
+
+    chunk_planes : int
+        planes number in a chunk
+
+    tissue_label : int
+
+    Returns
+    -------
+    get_tissue_chunks : list
+        [start, stop, tissue voxels number] of every chunk
+    """
+    chunks = []
+    for start in range(0, len(cube_array), chunk_planes):
+        stop = min(start + chunk_planes, len(cube_array))
+        chunks.append([start, stop, int(np.count_nonzero(cube_array[start:stop] == tissue_label))])
+    return chunks
+
+
+def get_fibrosis_number(chunks, percent):
+    """
+    Get the exact number of the fibrosis voxels
+
+    Parameters
+    ----------
+    chunks : list
+        see get_tissue_chunks
+
+    percent : float
+        percent of the tissue voxels
+
+    Returns
+    -------
+    get_fibrosis_number : list
+        [fibrosis voxels number, tissue voxels number]
+    """
+    tissue_number = sum(count for _, _, count in chunks)
+    return [int(round(min(max(percent, 0.), 100.)/100.*tissue_number)), tissue_number]
+
+
+def label_tissue_voxels(cube_array, fibers_array, start, stop, selected, tissue_label=1, fibrosis_label=2):
+    """
+    Label the selected tissue voxels of the chunk as fibrosis (in place), their fibers are set to 0
+
+    Parameters
+    ----------
+    cube_array : numpy array
+        (n0, n1, n2)
+
+    fibers_array : numpy array
+        (3, n0, n1, n2)
+
+    start, stop : int
+        chunk planes
+
+    selected : numpy array
+        indices (or bool mask) of the selected voxels among the chunk tissue voxels
+
+    tissue_label : int
+
+    fibrosis_label : int
+    """
+    tissue_indices = np.nonzero(cube_array[start:stop] == tissue_label)
+    tissue_indices = (tissue_indices[0][selected] + start, ) + tuple(indices[selected]
+                                                                     for indices in tissue_indices[1:])
+    cube_array[tissue_indices] = fibrosis_label
+    fibers_array[(slice(None), ) + tissue_indices] = 0
+
+
+def select_uniform_voxels(chunks, percent, seed=None):
+    """
+    Select the fibrosis voxels independently with the probability of percent (approximate number)
+
+    Parameters
+    ----------
+    chunks : list
+        see get_tissue_chunks
+
+    percent : float
+        percent of the tissue voxels
+
+    seed : int
+        same seed gives the same pattern (for any chunks size), random if None
+
+    Returns
+    -------
+    select_uniform_voxels : generator
+        bool mask of the selected voxels among the tissue voxels of every chunk (see label_tissue_voxels)
+    """
+    generator = np.random.default_rng(seed)
+    for _, _, count in chunks:
+        yield generator.random(count) < percent/100.
+
+
+def select_exact_uniform_voxels(chunks, fibrosis_number, seed=None):
+    """
+    Select exact number of the fibrosis voxels, sampled uniformly without replacement among the tissue voxels
+
+    Parameters
+    ----------
+    chunks : list
+        see get_tissue_chunks
+
+    fibrosis_number : int
+        see get_fibrosis_number
+
+    seed : int
+        same seed (and chunks) gives the same pattern, random if None
+
+    Returns
+    -------
+    select_exact_uniform_voxels : generator
+        indices of the selected voxels among the tissue voxels of every chunk (see label_tissue_voxels)
+    """
+    generator = np.random.default_rng(seed)
+    # number of the fibrosis voxels in every chunk, as if they were sampled from all the tissue voxels:
+    chunks_fibrosis = generator.multivariate_hypergeometric([count for _, _, count in chunks], fibrosis_number)
+
+    for (_, _, count), chunk_fibrosis in zip(chunks, chunks_fibrosis):
+        if chunk_fibrosis == 0:
+            yield np.array([], dtype=int)
+        else:
+            yield generator.choice(count, chunk_fibrosis, replace=False)
+
+
+def embed_uniform_fibrosis(cube_array, fibers_array, percent, seed=None, chunk_planes=32,
+                           tissue_label=1, fibrosis_label=2):
+    """
+    Label the tissue voxels as fibrosis (in place) independently with the probability of percent
+    (see select_uniform_voxels)
+
+    Parameters
+    ----------
+    cube_array : numpy array
+        (n0, n1, n2), voxels labels
+
+    fibers_array : numpy array
+        (3, n0, n1, n2)
+
+    percent : float
+        percent of the tissue voxels (expected)
+
+    seed : int
+        same seed gives the same pattern, random if None
+
+    chunk_planes : int
+
+    tissue_label : int
+
+    fibrosis_label : int
+
+    Returns
+    -------
+    embed_uniform_fibrosis : float
+        realized fraction of the fibrosis voxels in the tissue
+    """
+    chunks = get_tissue_chunks(cube_array, chunk_planes, tissue_label)
+    tissue_number = sum(count for _, _, count in chunks)
+    if tissue_number == 0:
+        return 0.
+
+    fibrosis_number = 0
+    for (start, stop, _), selected in zip(chunks, select_uniform_voxels(chunks, percent, seed)):
+        label_tissue_voxels(cube_array, fibers_array, start, stop, selected, tissue_label, fibrosis_label)
+        fibrosis_number += int(np.count_nonzero(selected))
+
+    return fibrosis_number/tissue_number
+
+
+def embed_exact_uniform_fibrosis(cube_array, fibers_array, percent, seed=None, chunk_planes=32,
+                                 tissue_label=1, fibrosis_label=2):
+    """
+    Label exact percent of the tissue voxels as fibrosis (in place), the voxels are sampled
+    uniformly without replacement among the tissue voxels only
+
+    Parameters
+    ----------
+    cube_array : numpy array
+        (n0, n1, n2), voxels labels
+
+    fibers_array : numpy array
+        (3, n0, n1, n2)
+
+    percent : float
+        percent of the tissue voxels
+
+    seed : int
+        same seed (and chunk_planes) gives the same pattern, random if None
+
+    chunk_planes : int
+
+    tissue_label : int
+
+    fibrosis_label : int
+
+    Returns
+    -------
+    embed_exact_uniform_fibrosis : float
+        realized fraction of the fibrosis voxels in the tissue
+    """
+    chunks = get_tissue_chunks(cube_array, chunk_planes, tissue_label)
+    fibrosis_number, tissue_number = get_fibrosis_number(chunks, percent)
+    if fibrosis_number == 0:
+        return 0.
+
+    for (start, stop, _), selected in zip(chunks, select_exact_uniform_voxels(chunks, fibrosis_number, seed)):
+        if len(selected):
+            label_tissue_voxels(cube_array, fibers_array, start, stop, selected, tissue_label, fibrosis_label)
+
+    return fibrosis_number/tissue_number
@@ -5,7 +5,7 @@
 def check_initialization(method):
     def wrapper(self, *args, **kwargs):
         if self.get_data_dict():
-            method(self, *args, **kwargs)
+            return method(self, *args, **kwargs)
         else:
             # means that the files were not loaded
             return
@@ -0,0 +1,193 @@
+import os
+import time
+import locale
+from contextlib import contextmanager
+import vtk
+
+
+# Writers of the vtk data objects:
+# .vtk - legacy format (binary by default)
+# .vtu, .vtp - xml format (appended raw data, zlib compressed by default)
+
+_XML_WRITERS = {
+    ".vtu": ["vtkUnstructuredGrid", vtk.vtkXMLUnstructuredGridWriter],
+    ".vtp": ["vtkPolyData", vtk.vtkXMLPolyDataWriter]
+}
+
+# xml data compressors (blocks are compressed one by one by vtk):
+COMPRESSORS = ("zlib", "lz4", "lzma")
+
+_LEGACY_WRITERS = {
+    "vtkUnstructuredGrid": vtk.vtkUnstructuredGridWriter,
+    "vtkPolyData": vtk.vtkPolyDataWriter
+}
+
+
+@contextmanager
+def c_numeric_locale():
+    """
+    Set the C numeric locale while writing.
+    Qt applies the system locale to the process, so the numbers
+    written as text may get commas instead of decimal points
+    """
+    previous_locale = locale.setlocale(locale.LC_NUMERIC)
+    locale.setlocale(locale.LC_NUMERIC, "C")
+    try:
+        yield
+    finally:
+        locale.setlocale(locale.LC_NUMERIC, previous_locale)
+
+
+def _set_compressor(writer, compressor, compression_level):
+    if compressor is None:
+        writer.SetCompressorTypeToNone()
+        return
+    if compressor == "zlib":
+        writer.SetCompressorTypeToZLib()
+    elif compressor == "lz4":
+        writer.SetCompressorTypeToLZ4()
+    elif compressor == "lzma":
+        writer.SetCompressorTypeToLZMA()
+    else:
+        raise ValueError("Unknown compressor: {} (possible: {})".format(compressor, ", ".join(COMPRESSORS)))
+    if compression_level is not None:
+        writer.SetCompressionLevel(compression_level)
+
+
+def _get_xml_writer(data_object, extension, binary, compressor, compression_level):
+    data_type, writer_class = _XML_WRITERS[extension]
+    if not data_object.IsA(data_type):
+        raise ValueError("{} file requires {}, got {}".format(extension, data_type, data_object.GetClassName()))
+
+    writer = writer_class()
+    if binary:
+        writer.SetDataModeToAppended()
+        writer.EncodeAppendedDataOff()  # raw bytes instead of base64
+        _set_compressor(writer, compressor, compression_level)
+    else:
+        writer.SetDataModeToAscii()
+    return writer
+
+
+def _get_legacy_writer(data_object, binary):
+    for data_type, writer_class in _LEGACY_WRITERS.items():
+        if data_object.IsA(data_type):
+            writer = writer_class()
+            break
+    else:
+        raise ValueError("Can't write {} to legacy vtk file".format(data_object.GetClassName()))
+
+    if binary:
+        writer.SetFileTypeToBinary()
+    else:
+        writer.SetFileTypeToASCII()
+    return writer
+
+
+def _to_float32(array):
+    float_array = vtk.vtkFloatArray()
+    float_array.DeepCopy(array)  # converts the values
+    float_array.SetName(array.GetName())
+    return float_array
+
+
+def downcast_to_float32(data_object):
+    """
+    Get a copy of the data object with the double points and point data arrays converted to float
+    (the data object isn't changed)
+
+    Parameters
+    ----------
+    data_object : vtk object
+        vtkUnstructuredGrid or vtkPolyData
+
+    Returns
+    -------
+    downcast_to_float32 : vtk object
+        topology is shared with the data object
+    """
+    output = data_object.NewInstance()
+    output.ShallowCopy(data_object)
+
+    points = data_object.GetPoints()
+    if points is not None and points.GetDataType() == vtk.VTK_DOUBLE:
+        float_points = vtk.vtkPoints()
+        float_points.SetData(_to_float32(points.GetData()))
+        output.SetPoints(float_points)
+
+    point_data = data_object.GetPointData()
+    output_point_data = output.GetPointData()
+    for i in range(point_data.GetNumberOfArrays()):
+        array = point_data.GetArray(i)
+        if array is None or array.GetDataType() != vtk.VTK_DOUBLE:
+            continue
+        float_array = _to_float32(array)
+        # replaces the double array with the same name:
+        output_point_data.AddArray(float_array)
+        if point_data.GetVectors() is array:
+            output_point_data.SetVectors(float_array)
+        if point_data.GetScalars() is array:
+            output_point_data.SetScalars(float_array)
+    return output
+
+
+def write_data_object(data_object, file_name, binary=True, compressor="zlib", compression_level=None,
+                      float32=False):
+    """
+    Write vtk data object to the file in a single pass, the format is defined by the file extension
+
+    Parameters
+    ----------
+    data_object : vtk object
+        vtkUnstructuredGrid or vtkPolyData
+
+    file_name : str
+        .vtk - legacy format, .vtu (unstructured grid), .vtp (polydata) - xml format
+
+    binary : bool
+        False - ascii file (written with the C numeric locale)
+
+    compressor : str
+        compression of the xml appended data: "zlib", "lz4", "lzma" or None (not compressed)
+
+    compression_level : int
+        from 1 (fast) to 9 (small), compressor default if None
+
+    float32 : bool
+        write double points and point data (e.g. fibers) as float
+
+    Returns
+    -------
+    write_data_object : dict
+        keys:
+        file_name : str
+        bytes : int, file size
+        time : float, wall time of the writing (s)
+    """
+    if data_object is None:
+        raise ValueError("No data to write to {}".format(file_name))
+
+    start_time = time.time()
+
+    if float32:
+        data_object = downcast_to_float32(data_object)
+
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension in _XML_WRITERS:
+        writer = _get_xml_writer(data_object, extension, binary, compressor, compression_level)
+    elif extension == ".vtk":
+        writer = _get_legacy_writer(data_object, binary)
+    else:
+        raise ValueError("Unknown vtk file extension: {}".format(extension))
+
+    writer.SetFileName(file_name)
+    writer.SetInputData(data_object)
+    with c_numeric_locale():
+        if not writer.Write():
+            raise IOError("Can't write the file {}".format(file_name))
+
+    return {
+        "file_name": file_name,
+        "bytes": os.path.getsize(file_name),
+        "time": time.time() - start_time
+    }
@@ -1,8 +1,9 @@
 from LVSplineReconstruction.reconstruction.var_z_algorithm.var_z_reconstruction import VarZReconstruction
 from LVSplineReconstruction.reconstruction.polygonal_surface_assembly import PolygonalSurfaceAssembly
 import vtk
-import fileinput
 from LVSplineReconstruction.additions.decorators import check_initialization
+from LVSplineReconstruction.additions import vtk_writers
+from SplineMeasurement.meridians_files import meridians_file
 
 
 # CODE REGIONS:
@@ -32,6 +33,10 @@ class ReconEngineManager:
             "surface": {}
         }
 
+        self._artifact_cache = None
+        self._mesh_key = None  # content key of the reconstruction inputs
+        self._surfaces_parameters = None  # reconstruction parameters of the constructed surfaces
+
     def connect_with_scene(self, vtk_scene):
         """
         Connect with the scene
@@ -81,8 +86,46 @@ class ReconEngineManager:
     def construct_mesh(self):
         """
         Perform reconstruction with input data
+        (taken from the artifacts cache if it was performed before with the same data and parameters)
         """
-        self._var_z_reconstruction.reconstruct()
+        self._reconstruct(self._var_z_reconstruction.reconstruct)
+        self._surfaces_parameters = self._get_surfaces_parameters()
+
+    @check_initialization
+    def update_mesh(self):
+        """
+        Rebuild the vertices mesh and fibers only (surfaces are kept) if the meridians and
+        the reconstruction parameters weren't changed since the last construct_mesh,
+        otherwise perform the full reconstruction (see construct_mesh).
+        The epi/endo spline tables are reused by the full reconstruction while the meridians and
+        psi/phi points are the same, so gamma changes don't refit the splines
+        """
+        if self._surfaces_parameters != self._get_surfaces_parameters():
+            self.construct_mesh()
+            return
+        # partial result must not be stored under the full reconstruction key:
+        self._reconstruct(self._var_z_reconstruction.construct_mesh, store=False)
+
+    def _get_surfaces_parameters(self):
+        # all the parameters change the surfaces: gamma_0, gamma_1 and the layers number
+        # define the base and the holes, psi/phi points - all of them
+        return self._var_z_reconstruction.get_parameters()
+
+    def _reconstruct(self, reconstruct, store=True):
+        artifact = None
+        self._mesh_key = None
+        if self._artifact_cache is not None:
+            self._mesh_key = self._artifact_cache.compute_key("Reconstruction", self._data_dict,
+                                                              self._var_z_reconstruction.get_parameters())
+            artifact = self._artifact_cache.get_artifact(self._mesh_key)
+
+        if artifact is not None:
+            self._var_z_reconstruction.set_reconstructed_dict(artifact)
+        else:
+            reconstruct()
+            if store and self._mesh_key is not None:
+                self._artifact_cache.put_artifact(self._mesh_key,
+                                                  self._var_z_reconstruction.get_reconstructed_dict())
         self._output_dict["mesh"] = self._var_z_reconstruction.get_full_mesh()
 
 # POLYGON MESH CONSTRUCTORS:
@@ -144,6 +187,17 @@ class ReconEngineManager:
 
 # SETTERS:
 
+    def set_artifact_cache(self, artifact_cache):
+        """
+        Set the artifacts cache to reuse the reconstructions performed before
+
+        Parameters
+        ----------
+        artifact_cache : object
+            LocalStorage class object
+        """
+        self._artifact_cache = artifact_cache
+
     def set_data_dict(self, data_dict):
         """
         Set data dict as an input to reconstruction
@@ -157,6 +211,17 @@ class ReconEngineManager:
         """
         self._data_dict = data_dict
         self._var_z_reconstruction.set_data_dict(self._data_dict)
+        self._surfaces_parameters = None  # surfaces must be reconstructed
+
+    def load_meridians_file(self, file_name):
+        """
+        Set data dict from the meridians file (see SplineMeasurement.meridians_files)
+
+        Parameters
+        ----------
+        file_name : str
+        """
+        self.set_data_dict(meridians_file.load_meridians_file(file_name))
 
     def set_wall_points(self, points_num):
         """
@@ -244,6 +309,20 @@ class ReconEngineManager:
         """
         return self._output_dict
 
+    def get_reconstructed_key(self):
+        """
+        Get content key of the reconstructed data (see LocalStorage.compute_key),
+        surfaces are defined by the mesh key
+
+        Returns
+        -------
+        get_reconstructed_key : str
+            None if the artifacts cache isn't used
+        """
+        if self._mesh_key is None:
+            return None
+        return self._artifact_cache.compute_key(self._mesh_key, sorted(self._output_dict["surface"]))
+
     def get_data_dict(self):
         """
         Get the input data
@@ -257,33 +336,67 @@ class ReconEngineManager:
 # WRITERS:
 
     @check_initialization
-    def write_unstructured_grid(self):
+    def write_unstructured_grid(self, file_name="MeshwFibers.vtk", binary=True, compressor="zlib",
+                                compression_level=None, float32=False):
         """
         Write vertices mesh with fibers to vtk file
+
+        Parameters
+        ----------
+        file_name : str
+            .vtk - legacy format, .vtu - xml format
+
+        binary : bool
+            False - ascii file
+
+        compressor : str
+            xml data compression: "zlib", "lz4", "lzma" or None
+
+        compression_level : int
+            from 1 (fast) to 9 (small), compressor default if None
+
+        float32 : bool
+            write fibers as float instead of double
+
+        Returns
+        -------
+        write_unstructured_grid : dict
+            file_name, bytes, time (see vtk_writers.write_data_object)
         """
-        writer = vtk.vtkUnstructuredGridWriter()
-        writer.SetFileName("MeshwFibers.vtk")
-        writer.SetInputData(self._var_z_reconstruction.get_full_mesh())
-        writer.Write()
-        self._file_correction("MeshwFibers.vtk")
+        mesh = self._var_z_reconstruction.get_full_mesh()
+        if mesh is None or mesh.GetNumberOfPoints() == 0:
+            raise ValueError("Vertices mesh wasn't constructed")
+        return vtk_writers.write_data_object(mesh, file_name, binary, compressor, compression_level, float32)
 
     @check_initialization
-    def write_polydata_grid(self):
+    def write_polydata_grid(self, file_name="LVSurfaces.vtk", binary=True, compressor="zlib",
+                            compression_level=None, float32=False):
         """
         Write lv polygonal surface to vtk file
+
+        Parameters
+        ----------
+        file_name : str
+            .vtk - legacy format, .vtp - xml format
+
+        binary : bool
+            False - ascii file
+
+        compressor : str
+            xml data compression: "zlib", "lz4", "lzma" or None
+
+        compression_level : int
+            from 1 (fast) to 9 (small), compressor default if None
+
+        float32 : bool
+            write double points as float
+
+        Returns
+        -------
+        write_polydata_grid : dict
+            file_name, bytes, time (see vtk_writers.write_data_object)
         """
-        writer = vtk.vtkPolyDataWriter()
-        writer.SetFileName("LVSurfaces.vtk")
-        writer.SetInputData(self._polygonal_surface_assembly.get_polydata())
-        writer.Write()
-        self._file_correction("LVSurfaces.vtk")
-
-    def _file_correction(self, file_name):
-        # when vtk file is writing (qt encoding?),
-        # points are replaced by commas, and it does
-        # not match the vtk file format
-        try:
-            for line in fileinput.input(file_name, inplace=True):
-                print (line.replace(',', '.'),)  # , (comma) is needed to avoid blank lines
-        except Exception:
-            print (">>> Problem with file correction (Debug)")
+        polydata = self._polygonal_surface_assembly.get_polydata()
+        if polydata is None or polydata.GetNumberOfPoints() == 0:
+            raise ValueError("Polygonal surfaces weren't constructed")
+        return vtk_writers.write_data_object(polydata, file_name, binary, compressor, compression_level, float32)
@@ -0,0 +1,120 @@
+from collections import OrderedDict
+from LVSplineReconstruction.reconstruction.var_z_algorithm.periodic_spline_interpolator import PeriodicSplineInterpolator
+
+
+class EvaluationMatrixCache:
+    """
+    Least recently used cache of the periodic phi splines evaluation matrices.
+    For the fixed nodes (meridians at i*2pi/n) the interpolated values are linear
+    in the nodes values: values = E @ nodes, so E is computed once for every
+    (meridians number, interpolated points number)
+    """
+
+    def __init__(self, max_size=32):
+        """
+        Parameters
+        ----------
+        max_size : int
+            max number of the stored matrices
+        """
+        self._max_size = max_size
+        self._matrices = OrderedDict()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def set_max_size(self, max_size):
+        """
+        Set max number of the stored matrices, the least recently used are removed
+
+        Parameters
+        ----------
+        max_size : int
+        """
+        self._max_size = max_size
+        self._evict()
+
+    def get_max_size(self):
+        """
+        Get max number of the stored matrices
+
+        Returns
+        -------
+        get_max_size : int
+        """
+        return self._max_size
+
+    def get_statistics(self):
+        """
+        Get the cache usage statistics
+
+        Returns
+        -------
+        get_statistics : dict
+            keys: hits, misses, evictions, size
+        """
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "size": len(self._matrices)
+        }
+
+    def clear(self):
+        """
+        Remove the stored matrices and reset the statistics
+        """
+        self._matrices = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _evict(self):
+        while len(self._matrices) > max(self._max_size, 0):
+            self._matrices.popitem(last=False)
+            self._evictions += 1
+
+    def get_matrix(self, nodes_number, points_number):
+        """
+        Get the evaluation matrix of the periodic spline (nodes i*2pi/n, i < n)
+
+        Parameters
+        ----------
+        nodes_number : int
+            number of meridians
+
+        points_number : int
+            number of interpolated points in [0, 2pi]
+
+        Returns
+        -------
+        get_matrix : numpy array (points_number, nodes_number)
+            read-only
+        """
+        key = (nodes_number, points_number)
+        matrix = self._matrices.get(key)
+        if matrix is not None:
+            self._hits += 1
+            self._matrices.move_to_end(key)
+        else:
+            self._misses += 1
+            matrix = PeriodicSplineInterpolator(nodes_number, points_number).get_evaluation_matrix()
+            matrix.flags.writeable = False
+            self._matrices[key] = matrix
+            self._evict()
+        return matrix
+
+
+_shared_cache = EvaluationMatrixCache()
+
+
+def get_shared_cache():
+    """
+    Get the cache shared by all the phi splines of the process
+
+    Returns
+    -------
+    get_shared_cache : EvaluationMatrixCache
+    """
+    return _shared_cache
@@ -0,0 +1,135 @@
+from math import pi
+import numpy as np
+
+
+class FibersField:
+    """
+    Fibers directions in the (gamma, psi, phi) grid points of the left ventricle wall.
+    All grid points are processed at once by the broadcasted numpy operations
+    """
+
+    def __init__(self):
+        self._gamma_array = np.array([])
+        self._psi_array = np.array([])
+        self._phi_array = np.array([])
+
+        self._ro_array_3d = np.array([])
+        self._dr_dgam = np.array([])
+        self._z_array = np.array([])
+
+        self._h = 0.
+        self._gamma_0 = 0.
+        self._gamma_1 = 1.
+        self._psi_step = 0.
+        self._phi_step = 0.
+
+        self._phi_max = 3*pi
+
+        self._fibers = [np.array([]), np.array([]), np.array([])]
+
+    def set_coordinates(self, gamma_array, psi_array, phi_array):
+        """
+        Set the grid coordinates
+
+        Parameters
+        ----------
+        gamma_array : numpy array (G, )
+
+        psi_array : numpy array (P, )
+
+        phi_array : numpy array (F, )
+        """
+        self._gamma_array = np.asarray(gamma_array, dtype=float)
+        self._psi_array = np.asarray(psi_array, dtype=float)
+        self._phi_array = np.asarray(phi_array, dtype=float)
+
+    def set_ro_arrays(self, ro_array_3d, dr_dgam):
+        """
+        Set the ro coordinates of the grid points and the ro derivative through the wall
+
+        Parameters
+        ----------
+        ro_array_3d : numpy array (G, P, F)
+
+        dr_dgam : numpy array (P, F)
+            ro_endo - ro_epi
+        """
+        self._ro_array_3d = np.asarray(ro_array_3d, dtype=float)
+        self._dr_dgam = np.asarray(dr_dgam, dtype=float)
+
+    def set_z_array(self, z_array):
+        """
+        Set the z coordinates used for the fibers z component
+
+        Parameters
+        ----------
+        z_array : numpy array (F, )
+        """
+        self._z_array = np.asarray(z_array, dtype=float)
+
+    def set_h(self, h):
+        self._h = h
+
+    def set_gamma_interval(self, gamma_0, gamma_1):
+        self._gamma_0 = gamma_0
+        self._gamma_1 = gamma_1
+
+    def set_steps(self, psi_step, phi_step):
+        """
+        Set the finite differences steps
+
+        Parameters
+        ----------
+        psi_step : float
+
+        phi_step : float
+        """
+        self._psi_step = psi_step
+        self._phi_step = phi_step
+
+    def get_fibers(self):
+        """
+        Get the fibers components
+
+        Returns
+        -------
+        get_fibers : list
+            [vx, vy, vz] - contiguous numpy arrays (G, P, F)
+        """
+        return self._fibers
+
+    def compute(self):
+        """
+        Compute the fibers components for all grid points
+        """
+        ro_array_3d = self._ro_array_3d
+        psi_number = ro_array_3d.shape[1]
+
+        gamma = self._gamma_array[:, np.newaxis, np.newaxis]
+        psi = self._psi_array[np.newaxis, :, np.newaxis]
+        cos_phi = np.cos(self._phi_array)
+        sin_phi = np.sin(self._phi_array)
+
+        # forward differences by psi (backward one for the last row):
+        next_rows = np.append(np.arange(1, psi_number), psi_number - 2)
+        dr_dpsi = (ro_array_3d[:, next_rows] - ro_array_3d)/self._psi_step
+        dr_dphi = (ro_array_3d - np.roll(ro_array_3d, 1, axis=2))/self._phi_step
+
+        sin_ph = np.sin(pi*gamma)
+        cos_ph = np.cos(pi*gamma)
+        gamma_interval = self._gamma_1 - self._gamma_0
+
+        dr_total = self._dr_dgam + dr_dphi*self._phi_max
+
+        fibers_x = (sin_ph/((pi - 2*psi)*gamma_interval) *
+                    (ro_array_3d*sin_phi*self._phi_max - dr_total*cos_phi) -
+                    cos_phi*dr_dpsi*pi/2*cos_ph)
+        fibers_y = (sin_ph/((2*psi - pi)*gamma_interval) *
+                    (ro_array_3d*cos_phi*self._phi_max - dr_total*sin_phi) -
+                    sin_phi*dr_dpsi*pi/2*cos_ph)
+        fibers_z = ((self._h*sin_ph*np.sin(psi))/((2*psi - pi)*gamma_interval) +
+                    (self._z_array - self._h*gamma)*np.cos(psi)*pi/2*cos_ph)
+
+        self._fibers = [np.ascontiguousarray(fibers_x, dtype=float),
+                        np.ascontiguousarray(fibers_y, dtype=float),
+                        np.ascontiguousarray(fibers_z, dtype=float)]
@@ -0,0 +1,97 @@
+import numpy as np
+from numpy import linspace
+from math import pi
+
+
+class PeriodicSplineInterpolator:
+    """
+    Periodic cubic spline interpolation by phi for equally spaced nodes (meridians at i*2pi/n).
+
+    Interpolated values are linear in the nodes values, so the spline is represented
+    by the evaluation matrix E (phi points, nodes): values = E @ nodes.
+    The matrix is built once in closed form - the periodic spline system
+    M[j-1] + 4*M[j] + M[j+1] = 6/h**2*(y[j-1] - 2*y[j] + y[j+1]) is circulant and
+    is solved by FFT, then any number of rows is interpolated by a single matrix multiply.
+    Same spline as scipy splrep(per=True, s=0) + splev
+    """
+
+    def __init__(self, nodes_number, points_number):
+        """
+        Parameters
+        ----------
+        nodes_number : int
+            number of meridians
+
+        points_number : int
+            number of interpolated points in [0, 2pi]
+        """
+        self._nodes_number = nodes_number
+        self._points_number = points_number
+
+        self._phi_array = linspace(0., 2*pi, points_number)
+        self._evaluation_matrix = self._compute_evaluation_matrix()
+
+    def get_phi_array(self):
+        """
+        Get a numpy array with phi coordinates of the interpolated points
+
+        Returns
+        -------
+        get_phi_array : numpy array (points_number, )
+        """
+        return self._phi_array
+
+    def get_evaluation_matrix(self):
+        """
+        Get the evaluation matrix
+
+        Returns
+        -------
+        get_evaluation_matrix : numpy array (points_number, nodes_number)
+        """
+        return self._evaluation_matrix
+
+    def _compute_second_derivatives_matrix(self):
+        # G: second derivatives in the nodes = 6/h**2*G @ nodes values,
+        # G is circulant, eigenvalues of both circulant matrices are known:
+        n = self._nodes_number
+        cos_k = np.cos(2*pi*np.arange(n)/n)
+        eigenvalues = (2*cos_k - 2)/(4 + 2*cos_k)
+        first_column = np.fft.ifft(eigenvalues).real
+        indices = np.arange(n)
+        return first_column[(indices[:, np.newaxis] - indices[np.newaxis, :]) % n]
+
+    def _compute_evaluation_matrix(self):
+        n = self._nodes_number
+        h = 2*pi/n
+
+        # interval of every point and the local coordinate t in [0, 1]:
+        left = np.minimum(np.floor(self._phi_array/h).astype(int), n - 1)
+        right = (left + 1) % n
+        t = self._phi_array/h - left
+
+        rows = np.arange(self._points_number)
+        linear_matrix = np.zeros((self._points_number, n))
+        cubic_matrix = np.zeros((self._points_number, n))
+        np.add.at(linear_matrix, (rows, left), 1 - t)
+        np.add.at(linear_matrix, (rows, right), t)
+        # h**2/6 factor of the cubic terms cancels with 6/h**2 of the second derivatives:
+        np.add.at(cubic_matrix, (rows, left), (1 - t)**3 - (1 - t))
+        np.add.at(cubic_matrix, (rows, right), t**3 - t)
+
+        return linear_matrix + cubic_matrix @ self._compute_second_derivatives_matrix()
+
+    def interpolate(self, rows):
+        """
+        Interpolate the nodes values
+
+        Parameters
+        ----------
+        rows : array_like (R, nodes_number) or (nodes_number, )
+            values on the meridians (without the repeated first node)
+
+        Returns
+        -------
+        interpolate : numpy array (R, points_number) or (points_number, )
+        """
+        return np.asarray(rows, dtype=float) @ self._evaluation_matrix.T
@@ -1,7 +1,7 @@
 import numpy as np
 from numpy import linspace
-from scipy import interpolate
 from math import pi
+from LVSplineReconstruction.reconstruction.var_z_algorithm.evaluation_matrix_cache import get_shared_cache
 
 
 class RoPhiSpline:
@@ -98,10 +98,9 @@ class RoPhiSpline:
 
         phi_array = linspace(phi_0, phi_1, self._phi_interval_points)
 
-        self._tck = interpolate.splrep(self._phi_list, self._ro_list, s=0, per=True)  # for b-spline
-        output_ro = interpolate.splev(phi_array, self._tck)
-
-        self._interpolate = interpolate.splev
+        # periodic spline is linear in the nodes values (the repeated first node is skipped)
+        evaluation_matrix = get_shared_cache().get_matrix(len(self._phi_list) - 1, self._phi_interval_points)
+        output_ro = evaluation_matrix @ np.asarray(self._ro_list[:-1], dtype=float)
 
         self._ro_array_1d = output_ro
         self._phi_array = phi_array
@@ -118,3 +117,20 @@ class RoPhiSpline:
         self._compute_ro_phi_spline()
         self._compute_x_y()
 
+    def compute_many(self, ro_rows):
+        """
+        Compute splines for a number of ro rows at once
+        (nodes are the same meridians for all rows, see EvaluationMatrixCache)
+
+        Parameters
+        ----------
+        ro_rows : array_like (R, n)
+            each row - ro coordinates on the n meridians
+
+        Returns
+        ----------
+        compute_many : numpy array (R, phi points)
+        """
+        evaluation_matrix = get_shared_cache().get_matrix(len(self._phi_list) - 1, self._phi_interval_points)
+        self._phi_array = linspace(0., 2*pi, self._phi_interval_points)
+        return np.asarray(ro_rows, dtype=float) @ evaluation_matrix.T
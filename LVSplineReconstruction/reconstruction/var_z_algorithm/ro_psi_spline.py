@@ -1,7 +1,7 @@
 import numpy as np
 from numpy import linspace
 from scipy import interpolate
-from math import pi, asin, sin
+from math import pi
 
 
 class RoPsiSpline:
@@ -120,15 +120,14 @@ class RoPsiSpline:
         self._ro_array_1d = output_ro
         self._psi_array = psi_array
 
+    @staticmethod
+    def _compute_psi_nodes(z_list, Zmax, h, gamma):
+        arg = (Zmax - np.asarray(z_list, dtype=float))/(Zmax - h*gamma)
+        # To prevent domain error:
+        return np.arcsin(np.clip(arg, -1.0, 1.0))
+
     def _compute_psi(self):
-        self._psi_list = []
-        for z in self._z_list:
-            arg = (self._Zmax - z) / (self._Zmax - self._h*self._gamma)
-            # To prevent domain error:
-            if arg > 1.0:
-                arg = 1.0
-            psi = asin(arg)
-            self._psi_list.append(psi)
+        self._psi_list = self._compute_psi_nodes(self._z_list, self._Zmax, self._h, self._gamma)
 
     def _compute_z(self):
         self._z_array_1d = (self._Zmax - (self._Zmax - self._h*self._gamma)*np.sin(self._psi_array))
@@ -141,3 +140,30 @@ class RoPsiSpline:
         self._compute_ro_psi_spline()
         self._compute_z()
 
+    def compute_many(self, meridians):
+        """
+        Compute splines for all meridians of the layer with the set gamma and h
+
+        Parameters
+        ----------
+        meridians : list
+            dicts with ro, z (spline nodes) and Zmax of the layer
+
+        Returns
+        -------
+        compute_many : list
+            [ro_table, z_table] - numpy arrays (meridians, psi points)
+        """
+        psi_array = linspace(0., pi/2, self._psi_interval_points)
+
+        ro_table = np.empty((len(meridians), len(psi_array)))
+        for i, meridian in enumerate(meridians):
+            psi_list = self._compute_psi_nodes(meridian["z"], meridian["Zmax"], self._h, self._gamma)
+            tck = interpolate.splrep(psi_list, meridian["ro"], s=0)
+            ro_table[i] = interpolate.splev(psi_array, tck)
+
+        zmax = np.array([meridian["Zmax"] for meridian in meridians], dtype=float)[:, np.newaxis]
+        z_table = zmax - (zmax - self._h*self._gamma)*np.sin(psi_array)
+
+        self._psi_array = psi_array
+        return [ro_table, z_table]
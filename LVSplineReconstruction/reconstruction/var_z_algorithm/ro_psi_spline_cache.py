@@ -0,0 +1,151 @@
+import numpy as np
+from LVSplineReconstruction.reconstruction.var_z_algorithm.ro_psi_spline import RoPsiSpline
+
+
+class RoPsiSplineCache:
+    """
+    RoPsiSpline results of the current reconstruction.
+    Surfaces, base, hole and mesh construction use the same meridians fits,
+    every (meridian, layer, gamma, Zmax, h, psi points) spline is computed once.
+    Should be cleared when the meridians data is changed
+    """
+
+    def __init__(self):
+        self._ro_psi_spline = RoPsiSpline()
+
+        self._meridians = []
+        self._h = 0.
+        self._psi_interval_points = 100
+
+        self._splines = {}
+
+        self._hits = 0
+        self._misses = 0
+
+    def set_meridians(self, meridians):
+        """
+        Set the meridians data, the cached splines are removed
+
+        Parameters
+        ----------
+        meridians : list
+            meridians dicts (keys: epi, endo; values: dicts with ro, z, Zmax)
+        """
+        self._meridians = meridians
+        self.clear()
+
+    def set_h(self, h):
+        """
+        Set h value (common for all meridians)
+
+        Parameters
+        ----------
+        h : float
+        """
+        self._h = h
+
+    def set_psi_intervals_points(self, points_num):
+        """
+        Set an interpolated points number
+
+        Parameters
+        ----------
+        points_num : int
+        """
+        self._psi_interval_points = points_num
+
+    def get_hits(self):
+        """
+        Get number of the splines taken from the cache
+
+        Returns
+        -------
+        get_hits : int
+        """
+        return self._hits
+
+    def get_misses(self):
+        """
+        Get number of the computed splines
+
+        Returns
+        -------
+        get_misses : int
+        """
+        return self._misses
+
+    def clear(self):
+        """
+        Remove the cached splines and reset the counters
+        """
+        self._splines = {}
+        self._hits = 0
+        self._misses = 0
+
+    def _get_key(self, meridian_index, layer, gamma):
+        Zmax = self._meridians[meridian_index][layer]["Zmax"]
+        return (meridian_index, layer, gamma, Zmax, self._h, self._psi_interval_points)
+
+    def _compute_splines(self, meridians_indices, layer, gamma):
+        # the missed meridians of the layer are computed by one batch
+        self._ro_psi_spline.set_gamma(gamma)
+        self._ro_psi_spline.set_h(self._h)
+        self._ro_psi_spline.set_psi_intervals_points(self._psi_interval_points)
+        ro_table, z_table = self._ro_psi_spline.compute_many(
+            [self._meridians[i][layer] for i in meridians_indices])
+
+        for i, meridian_index in enumerate(meridians_indices):
+            self._splines[self._get_key(meridian_index, layer, gamma)] = [ro_table[i], z_table[i]]
+        self._misses += len(meridians_indices)
+
+    def get_spline(self, meridian_index, layer, gamma):
+        """
+        Get the meridian contour interpolated by psi
+
+        Parameters
+        ----------
+        meridian_index : int
+
+        layer : str
+            epi or endo
+
+        gamma : float
+
+        Returns
+        -------
+        get_spline : list
+            [ro_array, z_array] - numpy arrays (psi points, ), should not be changed
+        """
+        key = self._get_key(meridian_index, layer, gamma)
+        if key in self._splines:
+            self._hits += 1
+        else:
+            self._compute_splines([meridian_index], layer, gamma)
+        return self._splines[key]
+
+    def get_layer_table(self, layer, gamma):
+        """
+        Get contours of all meridians of the layer
+
+        Parameters
+        ----------
+        layer : str
+            epi or endo
+
+        gamma : float
+
+        Returns
+        -------
+        get_layer_table : list
+            [ro_table, z_table] - numpy arrays (meridians, psi points)
+        """
+        meridians_number = len(self._meridians)
+        missed = [i for i in range(meridians_number)
+                  if self._get_key(i, layer, gamma) not in self._splines]
+        if missed:
+            self._compute_splines(missed, layer, gamma)
+        self._hits += meridians_number - len(missed)
+
+        splines = [self._splines[self._get_key(i, layer, gamma)] for i in range(meridians_number)]
+        return [np.array([spline[0] for spline in splines]),
+                np.array([spline[1] for spline in splines])]
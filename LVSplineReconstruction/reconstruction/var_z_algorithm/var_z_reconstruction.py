@@ -2,9 +2,11 @@ import vtk
 import fileinput
 from math import pi, sin, cos, sqrt
 import numpy as np
-from LVSplineReconstruction.reconstruction.var_z_algorithm.ro_psi_spline import RoPsiSpline
+from vtk.util import numpy_support
+from LVSplineReconstruction.reconstruction.var_z_algorithm.ro_psi_spline_cache import RoPsiSplineCache
 from LVSplineReconstruction.reconstruction.var_z_algorithm.z_phi_spline import ZPhiSpline
 from LVSplineReconstruction.reconstruction.var_z_algorithm.ro_phi_spline import RoPhiSpline
+from LVSplineReconstruction.reconstruction.var_z_algorithm.fibers_field import FibersField
 
 
 # CODE REGIONS:
@@ -40,16 +42,18 @@ class VarZReconstruction:
         self._y_array_surface = np.array([])
         self._z_array_surface = np.array([])
 
-        self._ro_psi_spline = RoPsiSpline()
+        self._ro_psi_spline_cache = RoPsiSplineCache()
         self._z_phi_spline = ZPhiSpline()
         self._ro_phi_spline = RoPhiSpline()
         self._ro_phi_spline_epi = RoPhiSpline()
         self._ro_phi_spline_endo = RoPhiSpline()
-        self._ro_phi_spline_epi_1 = RoPhiSpline()
-        self._ro_phi_spline_endo_1 = RoPhiSpline()
+        self._fibers_field = FibersField()
 
         self._meridians_number = 0
 
+        self._mesh_tables = None
+        self._mesh_tables_key = None
+
     def reconstruct(self):
         self.construct_surfaces()
         self.construct_mesh()
@@ -61,15 +65,12 @@ class VarZReconstruction:
         self._ro_phi_spline.set_number_of_meridians(self._meridians_number)
         self._ro_phi_spline_epi.set_number_of_meridians(self._meridians_number)
         self._ro_phi_spline_endo.set_number_of_meridians(self._meridians_number)
-        self._ro_phi_spline_epi_1.set_number_of_meridians(self._meridians_number)
-        self._ro_phi_spline_endo_1.set_number_of_meridians(self._meridians_number)
 
-        self._ro_psi_spline.set_psi_intervals_points(self._psi_points_number)
+        self._ro_psi_spline_cache.set_psi_intervals_points(self._psi_points_number)
+        self._ro_psi_spline_cache.set_h(self._data_dict["common"]["h"])
         self._ro_phi_spline.set_phi_intervlals_points(self._phi_points_number)
         self._ro_phi_spline_endo.set_phi_intervlals_points(self._phi_points_number)
-        self._ro_phi_spline_endo_1.set_phi_intervlals_points(self._phi_points_number)
         self._ro_phi_spline_epi.set_phi_intervlals_points(self._phi_points_number)
-        self._ro_phi_spline_epi_1.set_phi_intervlals_points(self._phi_points_number)
         self._z_phi_spline.set_z_intervlals_points(self._phi_points_number)
 
 # GETTERS:
@@ -83,10 +84,38 @@ class VarZReconstruction:
     def get_surfaces_dict(self):
         return self._surfaces_dict
 
+    def get_ro_psi_spline_cache(self):
+        return self._ro_psi_spline_cache
+
+    def get_parameters(self):
+        # all parameters the reconstruction depends on (except the data dict)
+        return {
+            "psi_points": self._psi_points_number,
+            "phi_points": self._phi_points_number,
+            "gamma_layers": self._gamma_layers_number,
+            "gamma_0": self._gamma_0,
+            "gamma_1": self._gamma_1
+        }
+
+    def get_reconstructed_dict(self):
+        return {
+            "mesh": self._full_mesh,
+            "surfaces_dict": dict(self._surfaces_dict),
+            "surfaces_mesh": self._surfaces_mesh
+        }
+
 # SETTERS:
 
     def set_data_dict(self, data_dict):
         self._data_dict = data_dict
+        self._ro_psi_spline_cache.set_meridians(data_dict.get("meridians", []))
+        self._mesh_tables = None
+
+    def set_reconstructed_dict(self, reconstructed_dict):
+        # restore the results of reconstruct() (see get_reconstructed_dict)
+        self._full_mesh = reconstructed_dict["mesh"]
+        self._surfaces_dict = dict(reconstructed_dict["surfaces_dict"])
+        self._surfaces_mesh = reconstructed_dict["surfaces_mesh"]
 
     def set_gamma_1(self, gamma_1):
         self._gamma_1 = gamma_1
@@ -141,39 +170,16 @@ class VarZReconstruction:
         return [x, y, z]
 
     def construct_lv_surface(self, layer, gamma):
-        x_list = []
-        y_list = []
-        z_list = []
+        ro_table, z_table = self._ro_psi_spline_cache.get_layer_table(layer, gamma)
 
-        z_coordinates = []
-        ro_coordinates = []
-        for meridian in self._data_dict["meridians"]:
-            self._ro_psi_spline.set_coordiantes(meridian[layer]["ro"],
-                                                meridian[layer]["z"])
-            self._ro_psi_spline.set_gamma(gamma)
-            self._ro_psi_spline.set_Zmax(meridian[layer]["Zmax"])
-            self._ro_psi_spline.set_h(self._data_dict["common"]["h"])
-            self._ro_psi_spline.compute()
-            ro_coordinates.append(self._ro_psi_spline.get_ro_array())
-            z_coordinates.append(self._ro_psi_spline.get_z_array())
-
-        z_array = np.array(z_coordinates).T
-        ro_array = np.array(ro_coordinates).T
-
-        for z_level_list in z_array:
-            self._z_phi_spline.set_z_list(z_level_list)
-            self._z_phi_spline.compute()
-            z_list.append(self._z_phi_spline.get_z_array())
+        # all psi levels are interpolated by phi at once (shape: psi, phi):
+        z_array = self._z_phi_spline.compute_many(z_table.T)
+        ro_array = self._ro_phi_spline.compute_many(ro_table.T)
+        phi_array = self._ro_phi_spline.get_phi_array()
 
-        for ro_level_list in ro_array:
-            self._ro_phi_spline.set_ro_list(ro_level_list)
-            self._ro_phi_spline.compute()
-            x_list.append(self._ro_phi_spline.get_x_array())
-            y_list.append(self._ro_phi_spline.get_y_array())
-
-        return [np.array(x_list).flatten(),
-                np.array(y_list).flatten(),
-                np.array(z_list).flatten()]
+        return [(ro_array*np.cos(phi_array)).flatten(),
+                (ro_array*np.sin(phi_array)).flatten(),
+                z_array.flatten()]
 
     def construct_lv_base(self):
         x_list = []
@@ -181,31 +187,11 @@ class VarZReconstruction:
         z_list = []
 
         ro_array_list = []
-        ro_list_epi = []
-        ro_list_endo = []
-
-        zmax_list = []
-
         gamma_list = np.linspace(0, 1, self._gamma_layers_number)
 
-        for meridian in self._data_dict["meridians"]:
-            self._ro_psi_spline.set_coordiantes(meridian["epi"]["ro"],
-                                                meridian["epi"]["z"])
-            self._ro_psi_spline.set_gamma(self._gamma_0)
-            self._ro_psi_spline.set_Zmax(meridian["epi"]["Zmax"])
-            self._ro_psi_spline.set_h(self._data_dict["common"]["h"])
-            self._ro_psi_spline.compute()
-            ro_list_epi.append(self._ro_psi_spline.get_ro_array())
-
-        for meridian in self._data_dict["meridians"]:
-            self._ro_psi_spline.set_coordiantes(meridian["endo"]["ro"],
-                                                meridian["endo"]["z"])
-            self._ro_psi_spline.set_gamma(self._gamma_1)
-            self._ro_psi_spline.set_Zmax(meridian["endo"]["Zmax"])
-            self._ro_psi_spline.set_h(self._data_dict["common"]["h"])
-            self._ro_psi_spline.compute()
-            ro_list_endo.append(self._ro_psi_spline.get_ro_array())
-            zmax_list.append(meridian["endo"]["Zmax"])
+        ro_list_epi = self._ro_psi_spline_cache.get_layer_table("epi", self._gamma_0)[0]
+        ro_list_endo = self._ro_psi_spline_cache.get_layer_table("endo", self._gamma_1)[0]
+        zmax_list = [meridian["endo"]["Zmax"] for meridian in self._data_dict["meridians"]]
 
         h = self._data_dict["common"]["h"]
 
@@ -243,31 +229,11 @@ class VarZReconstruction:
         z_list = []
 
         ro_array_list = []
-        ro_list_epi = []
-        ro_list_endo = []
-
-        zmax_list = []
-
         gamma_list = [gamma, ]
 
-        for meridian in self._data_dict["meridians"]:
-            self._ro_psi_spline.set_coordiantes(meridian["epi"]["ro"],
-                                                meridian["epi"]["z"])
-            self._ro_psi_spline.set_gamma(self._gamma_0)
-            self._ro_psi_spline.set_Zmax(meridian["epi"]["Zmax"])
-            self._ro_psi_spline.set_h(self._data_dict["common"]["h"])
-            self._ro_psi_spline.compute()
-            ro_list_epi.append(self._ro_psi_spline.get_ro_array())
-
-        for meridian in self._data_dict["meridians"]:
-            self._ro_psi_spline.set_coordiantes(meridian["endo"]["ro"],
-                                                meridian["endo"]["z"])
-            self._ro_psi_spline.set_gamma(self._gamma_1)
-            self._ro_psi_spline.set_Zmax(meridian["endo"]["Zmax"])
-            self._ro_psi_spline.set_h(self._data_dict["common"]["h"])
-            self._ro_psi_spline.compute()
-            ro_list_endo.append(self._ro_psi_spline.get_ro_array())
-            zmax_list.append(meridian["endo"]["Zmax"])
+        ro_list_epi = self._ro_psi_spline_cache.get_layer_table("epi", self._gamma_0)[0]
+        ro_list_endo = self._ro_psi_spline_cache.get_layer_table("endo", self._gamma_1)[0]
+        zmax_list = [meridian["endo"]["Zmax"] for meridian in self._data_dict["meridians"]]
 
         h = self._data_dict["common"]["h"]
 
@@ -300,144 +266,118 @@ class VarZReconstruction:
 
 # MESH AND FIBERS CONSTRUCTION:
 
-    def construct_mesh(self):
-        self.set_number_of_meridians(len(self._data_dict["meridians"]))
-        self._initialize_splines()
-
-        x_array_3d = []
-        y_array_3d = []
-        z_array_3d = []
-        fibers_x_3d = []
-        fibers_y_3d = []
-        fibers_z_3d = []
-        ro_array_3d = []
-        ro_list_epi = []
-        ro_list_endo = []
-
-        zmax_list = []
-
-        gamma_list = np.linspace(self._gamma_0, self._gamma_1, self._gamma_layers_number)
-
+    def _get_mesh_tables_key(self):
+        # everything the epi/endo tables depend on (but not gamma_0, gamma_1 and layers number)
+        key = [self._data_dict["common"]["h"], self._psi_points_number, self._phi_points_number]
         for meridian in self._data_dict["meridians"]:
-            self._ro_psi_spline.set_coordiantes(meridian["epi"]["ro"],
-                                                meridian["epi"]["z"])
-            self._ro_psi_spline.set_gamma(0)
-            self._ro_psi_spline.set_Zmax(meridian["epi"]["Zmax"])
-            self._ro_psi_spline.set_h(self._data_dict["common"]["h"])
-            self._ro_psi_spline.compute()
-            ro_list_epi.append(self._ro_psi_spline.get_ro_array())
-
-        for meridian in self._data_dict["meridians"]:
-            self._ro_psi_spline.set_coordiantes(meridian["endo"]["ro"],
-                                                meridian["endo"]["z"])
-            self._ro_psi_spline.set_gamma(1)
-            self._ro_psi_spline.set_Zmax(meridian["endo"]["Zmax"])
-            self._ro_psi_spline.set_h(self._data_dict["common"]["h"])
-            self._ro_psi_spline.compute()
-            ro_list_endo.append(self._ro_psi_spline.get_ro_array())
-            zmax_list.append(meridian["endo"]["Zmax"])
+            for layer in ("epi", "endo"):
+                key.append(np.asarray(meridian[layer]["ro"], dtype=float).tobytes())
+                key.append(np.asarray(meridian[layer]["z"], dtype=float).tobytes())
+                key.append(meridian[layer]["Zmax"])
+        return tuple(key)
+
+    def _compute_mesh_tables(self):
+        ro_list_epi = self._ro_psi_spline_cache.get_layer_table("epi", 0)[0]
+        ro_list_endo = self._ro_psi_spline_cache.get_layer_table("endo", 1)[0]
+        zmax_list = [meridian["endo"]["Zmax"] for meridian in self._data_dict["meridians"]]
+
+        ro_array_epi = np.array(ro_list_epi).T
+        ro_array_endo = np.array(ro_list_endo).T
+
+        # epi and endo splines don't depend on gamma - every psi row is fitted once,
+        # gamma layers are their linear combinations:
+        ro_phi_epi = self._ro_phi_spline_epi.compute_many(ro_array_epi)
+        ro_phi_endo = self._ro_phi_spline_endo.compute_many(ro_array_endo)
+
+        # z spline nodes zmax - (zmax - h*gamma)*sin(psi) are linear in zmax,
+        # so the only spline needed is the zmax one (spline of constant nodes is the constant):
+        self._z_phi_spline.set_z_list(zmax_list)
+        self._z_phi_spline.compute()
+
+        return {
+            "ro_phi_epi": ro_phi_epi,
+            "ro_phi_endo": ro_phi_endo,
+            "phi_array": self._ro_phi_spline_endo.get_phi_array(),
+            "psi_array": np.linspace(0, (pi/2-0.0001), len(ro_array_endo)),  # -0.0001 to prevent a value error
+            "zmax_phi": self._z_phi_spline.get_z_array()
+        }
 
-        h = self._data_dict["common"]["h"]
+    def _get_mesh_tables(self):
+        # the tables are reused while the meridians and resolution are the same,
+        # so the gamma_0, gamma_1 change reruns the layers interpolation and fibers only
+        key = self._get_mesh_tables_key()
+        if self._mesh_tables is None or key != self._mesh_tables_key:
+            self.set_number_of_meridians(len(self._data_dict["meridians"]))
+            self._initialize_splines()
+            self._mesh_tables = self._compute_mesh_tables()
+            self._mesh_tables_key = key
+        return self._mesh_tables
 
-        ro_array_epi = list(np.array(ro_list_epi).T)
-        ro_array_endo = list(np.array(ro_list_endo).T)
+    def construct_mesh(self):
+        mesh_tables = self._get_mesh_tables()
 
-        psi_array = np.linspace(0, (pi/2-0.0001), len(ro_array_endo))  # -0.0001 to prevent a value error
+        h = self._data_dict["common"]["h"]
+        gamma_list = np.linspace(self._gamma_0, self._gamma_1, self._gamma_layers_number)
 
-        for gamma in gamma_list:
-            for i in range(len(ro_array_endo)):
-                self._ro_phi_spline_epi.set_ro_list(ro_array_epi[i])
-                self._ro_phi_spline_epi.compute()
-                self._ro_phi_spline_endo.set_ro_list(ro_array_endo[i])
-                self._ro_phi_spline_endo.compute()
-                ro_array_3d.append(self._ro_phi_spline_epi.get_ro_array()*(1 - gamma) +
-                                   self._ro_phi_spline_endo.get_ro_array()*gamma)
-
-                x_array_3d.append(ro_array_3d[-1]*np.cos(self._ro_phi_spline_endo.get_phi_array()))
-                y_array_3d.append(ro_array_3d[-1]*np.sin(self._ro_phi_spline_endo.get_phi_array()))
-
-                z_mer_list = []
-                for zmax in zmax_list:
-                    z_mer_list.append(zmax - (zmax - h*gamma)*sin(psi_array[i]))
-                self._z_phi_spline.set_z_list(z_mer_list)
-                self._z_phi_spline.compute()
-                z_array_3d.append(self._z_phi_spline.get_z_array())
-
-                dr_dgam = self._ro_phi_spline_endo.get_ro_array() - self._ro_phi_spline_epi.get_ro_array()
-
-                if i == len(ro_array_endo) - 1:
-                    self._ro_phi_spline_epi_1.set_ro_list(ro_array_epi[i-1])
-                    self._ro_phi_spline_epi_1.compute()
-                    self._ro_phi_spline_endo_1.set_ro_list(ro_array_endo[i-1])
-                    self._ro_phi_spline_endo_1.compute()
-                else:
-                    self._ro_phi_spline_epi_1.set_ro_list(ro_array_epi[i+1])
-                    self._ro_phi_spline_epi_1.compute()
-                    self._ro_phi_spline_endo_1.set_ro_list(ro_array_endo[i+1])
-                    self._ro_phi_spline_endo_1.compute()
-
-                dr_dpsi = ((self._ro_phi_spline_epi_1.get_ro_array()*(1 - gamma) +
-                            self._ro_phi_spline_endo_1.get_ro_array()*gamma) -
-                            (self._ro_phi_spline_epi.get_ro_array()*(1 - gamma) +
-                            self._ro_phi_spline_endo.get_ro_array()*gamma))/(pi/2/self._psi_points_number)
-
-                dr_dphi = ((self._ro_phi_spline_epi.get_ro_array()*(1 - gamma) +
-                            self._ro_phi_spline_endo.get_ro_array()*gamma) -
-                           (np.roll(self._ro_phi_spline_epi.get_ro_array(), 1)*(1 - gamma) +
-                            np.roll(self._ro_phi_spline_endo.get_ro_array(), 1)*gamma))/(2*pi/self._phi_points_number)
-
-                Ph = pi*gamma
-                phi_max = 3*pi
-                phi_array = self._ro_phi_spline_endo.get_phi_array()
-
-                fibers_x_3d.append(sin(Ph)/((pi - 2*psi_array[i])*(self._gamma_1 - self._gamma_0)) *
-                                         (y_array_3d[-1]*phi_max -
-                                         (dr_dgam + dr_dphi*phi_max)*np.cos(phi_array)) -
-                                         np.cos(phi_array)*dr_dpsi*pi/2*cos(Ph))
-                fibers_y_3d.append(sin(Ph)/((2*psi_array[i] - pi)*(self._gamma_1 - self._gamma_0)) *
-                                         (x_array_3d[-1]*phi_max -
-                                         (dr_dgam + dr_dphi*phi_max)*np.sin(phi_array)) -
-                                         np.sin(phi_array)*dr_dpsi*pi/2*cos(Ph))
-                fibers_z_3d.append((h*sin(Ph)*np.sin(psi_array[i]))/((2*psi_array[i] - pi) *
-                                         (self._gamma_1 - self._gamma_0)) +
-                                         (np.array(z_array_3d[0]) - h*gamma) *
-                                         np.cos(psi_array[i])*pi/2*cos(Ph))
-
-        points_z = np.array(z_array_3d).flatten()
-        points_x = np.array(x_array_3d).flatten()
-        points_y = np.array(y_array_3d).flatten()
-
-        vx_array_3d = np.array(fibers_x_3d).flatten()
-        vy_array_3d = np.array(fibers_y_3d).flatten()
-        vz_array_3d = np.array(fibers_z_3d).flatten()
+        ro_phi_epi = mesh_tables["ro_phi_epi"]  # (psi, phi)
+        ro_phi_endo = mesh_tables["ro_phi_endo"]
+        phi_array = mesh_tables["phi_array"]
+        psi_array = mesh_tables["psi_array"]
+        zmax_phi = mesh_tables["zmax_phi"]
+
+        # (gamma, psi, phi) grids:
+        gamma_3d = gamma_list[:, np.newaxis, np.newaxis]
+        ro_array_3d = ro_phi_epi*(1 - gamma_3d) + ro_phi_endo*gamma_3d
+        x_array_3d = ro_array_3d*np.cos(phi_array)
+        y_array_3d = ro_array_3d*np.sin(phi_array)
+
+        sin_psi_3d = np.sin(psi_array)[np.newaxis, :, np.newaxis]
+        z_array_3d = zmax_phi*(1 - sin_psi_3d) + h*gamma_3d*sin_psi_3d*np.ones_like(zmax_phi)
+
+        self._fibers_field.set_coordinates(gamma_list, psi_array, phi_array)
+        self._fibers_field.set_ro_arrays(ro_array_3d, ro_phi_endo - ro_phi_epi)
+        self._fibers_field.set_z_array(z_array_3d[0, 0])
+        self._fibers_field.set_h(h)
+        self._fibers_field.set_gamma_interval(self._gamma_0, self._gamma_1)
+        self._fibers_field.set_steps(pi/2/self._psi_points_number, 2*pi/self._phi_points_number)
+        self._fibers_field.compute()
+        vx_array_3d, vy_array_3d, vz_array_3d = [fibers.flatten() for fibers in
+                                                 self._fibers_field.get_fibers()]
+
+        points_z = z_array_3d.flatten()
+        points_x = x_array_3d.flatten()
+        points_y = y_array_3d.flatten()
 
         self._full_mesh = self._construct_vtk_mesh([points_x, points_y, points_z],
                                                    [vx_array_3d, vy_array_3d, vz_array_3d])
 
     def _construct_vtk_mesh(self, points, fibers=None):
+        # points and fibers are converted in bulk from numpy buffers,
+        # every point is a VTK_VERTEX cell
         vtk_mesh = vtk.vtkUnstructuredGrid()
-        vtk_points = vtk.vtkPoints()
 
-        if fibers:
-            fibers_array = vtk.vtkDoubleArray()
-            fibers_array.SetNumberOfComponents(3)
-            fibers_array.SetName("Fibers")
+        points_array = np.column_stack([np.ravel(points[0]),
+                                        np.ravel(points[1]),
+                                        np.ravel(points[2])]).astype(np.float32)  # vtkPoints default type
+        points_number = len(points_array)
 
-        for i in range(len(points[0])):
-            vtk_points.InsertPoint(i, points[0][i],
-                                   points[1][i],
-                                   points[2][i])
-            vertex = vtk.vtkVertex()
-            vertex.GetPointIds().SetId(0, i)
-            vtk_mesh.InsertNextCell(vertex.GetCellType(), vertex.GetPointIds())
+        vtk_points = vtk.vtkPoints()
+        vtk_points.SetData(numpy_support.numpy_to_vtk(points_array, deep=True))
 
-            if fibers:
-                fibers_array.InsertNextTuple3(*self.norm_vector([fibers[0][i], fibers[1][i], fibers[2][i]]))
+        cell_array = vtk.vtkCellArray()
+        cell_array.SetData(numpy_support.numpy_to_vtkIdTypeArray(np.arange(points_number + 1), deep=True),
+                           numpy_support.numpy_to_vtkIdTypeArray(np.arange(points_number), deep=True))
 
         vtk_mesh.SetPoints(vtk_points)
+        vtk_mesh.SetCells(vtk.VTK_VERTEX, cell_array)
 
         if fibers:
-            vtk_mesh.GetPointData().SetVectors(fibers_array)
+            fibers_array = self.norm_vectors(np.column_stack([np.ravel(fibers[0]),
+                                                              np.ravel(fibers[1]),
+                                                              np.ravel(fibers[2])]).astype(float))
+            vtk_fibers_array = numpy_support.numpy_to_vtk(fibers_array, deep=True)
+            vtk_fibers_array.SetName("Fibers")
+            vtk_mesh.GetPointData().SetVectors(vtk_fibers_array)
 
         return vtk_mesh
 
@@ -445,3 +385,9 @@ class VarZReconstruction:
     def norm_vector(vector):
         sum = sqrt(vector[0]**2 + vector[1]**2 + vector[2]**2)
         return [vector[0]/sum, vector[1]/sum, vector[2]/sum]
+
+    @staticmethod
+    def norm_vectors(vectors):
+        # (N, 3) array, each row is normalized
+        norm = np.sqrt(vectors[:, 0]**2 + vectors[:, 1]**2 + vectors[:, 2]**2)
+        return vectors/norm[:, np.newaxis]
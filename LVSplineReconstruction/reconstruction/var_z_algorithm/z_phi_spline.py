@@ -1,7 +1,7 @@
 from numpy import linspace
-from scipy import interpolate
 from math import pi
 import numpy as np
+from LVSplineReconstruction.reconstruction.var_z_algorithm.evaluation_matrix_cache import get_shared_cache
 
 
 class ZPhiSpline:
@@ -76,8 +76,9 @@ class ZPhiSpline:
 
         phi_array = linspace(phi_0, phi_1, self._z_interval_points)
 
-        self._tck = interpolate.splrep(self._phi_list, self._z_list, s=0, per=True)  # for b-spline
-        output_z = interpolate.splev(phi_array, self._tck)
+        # periodic spline is linear in the nodes values (the repeated first node is skipped)
+        evaluation_matrix = get_shared_cache().get_matrix(len(self._phi_list) - 1, self._z_interval_points)
+        output_z = evaluation_matrix @ np.asarray(self._z_list[:-1], dtype=float)
 
         self._z_array_1d = output_z
         self._phi_array = phi_array
@@ -87,3 +88,21 @@ class ZPhiSpline:
         Compute spline with the set z coordinates and for set number of meridians
         """
         self._compute_z_phi_spline()
+
+    def compute_many(self, z_rows):
+        """
+        Compute splines for a number of z rows at once
+        (nodes are the same meridians for all rows, see EvaluationMatrixCache)
+
+        Parameters
+        ----------
+        z_rows : array_like (R, n)
+            each row - z coordinates on the n meridians
+
+        Returns
+        ----------
+        compute_many : numpy array (R, phi points)
+        """
+        evaluation_matrix = get_shared_cache().get_matrix(len(self._phi_list) - 1, self._z_interval_points)
+        self._phi_array = linspace(0., 2*pi, self._z_interval_points)
+        return np.asarray(z_rows, dtype=float) @ evaluation_matrix.T
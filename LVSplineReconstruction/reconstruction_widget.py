@@ -103,6 +103,7 @@ class ReconstructionWidget(QtWidgets.QWidget):
 
     def connect_with_storage(self, local_storage):
         self._local_storage = local_storage
+        self._engine_manager.set_artifact_cache(local_storage)
 
 # INFO LINE TEXT SET:
 
@@ -130,13 +131,14 @@ class ReconstructionWidget(QtWidgets.QWidget):
 
     def upload(self):
         self._local_storage.upload_data(self._storage_regist_key,
-                                        self._engine_manager.get_reconstructed())
+                                        self._engine_manager.get_reconstructed(),
+                                        self._engine_manager.get_reconstructed_key())
         self.set_info_status("Model were loaded to the local storage")
 
     def construct_diff_mesh(self):
         self.set_reconstruction_parameters()
         self.set_fibers_field_parameters()
-        self._engine_manager.construct_mesh()
+        self._engine_manager.update_mesh()  # surfaces are rebuilt if the meridians or any parameter was changed
         self._engine_manager.visualize_diff_mesh()
         self.set_info_status("Finite-difference mesh was constructed")
 
@@ -148,10 +150,34 @@ class ReconstructionWidget(QtWidgets.QWidget):
         self.set_info_status("Polygonal mesh was constructed")
 
     def export_diff_mesh(self):
-        self._engine_manager.write_unstructured_grid()
+        file_name, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export mesh", "MeshwFibers.vtk",
+                                                             "Legacy vtk (*.vtk);;XML vtk (*.vtu)")
+        if file_name:
+            try:
+                report = self._engine_manager.write_unstructured_grid(file_name)
+            except (ValueError, IOError) as error:
+                self.set_info_status("Mesh wasn't exported: {}".format(error))
+                return
+            if report is None:
+                self.set_info_status("Mesh wasn't exported: LV meridians weren't loaded")
+                return
+            self.set_info_status("Mesh was exported to {} ({:.1f} MB, {:.2f} s)".format(
+                file_name, report["bytes"]/2**20, report["time"]))
 
     def export_poly_surface(self):
-        self._engine_manager.write_polydata_grid()
+        file_name, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export surface", "LVSurfaces.vtk",
+                                                             "Legacy vtk (*.vtk);;XML vtk (*.vtp)")
+        if file_name:
+            try:
+                report = self._engine_manager.write_polydata_grid(file_name)
+            except (ValueError, IOError) as error:
+                self.set_info_status("Surface wasn't exported: {}".format(error))
+                return
+            if report is None:
+                self.set_info_status("Surface wasn't exported: LV meridians weren't loaded")
+                return
+            self.set_info_status("Surface was exported to {} ({:.1f} MB, {:.2f} s)".format(
+                file_name, report["bytes"]/2**20, report["time"]))
 
     def set_opacity_value(self, i):
         self._engine_manager.set_opacity(i / 100.)  # should be float
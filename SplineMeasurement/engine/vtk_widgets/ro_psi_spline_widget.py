@@ -1,6 +1,6 @@
 from vtk import vtkSplineWidget, vtkLineSource, vtkActor, vtkPolyDataMapper
 from numpy import linspace
-from math import pi, asin, sqrt, sin
+from math import pi, sqrt, sin
 from scipy import interpolate
 import numpy as np
 
@@ -207,22 +207,14 @@ class RoPsiSplineWidget(vtkSplineWidget):
 # COORDINATES TRANSFORMATION:
 
     def _handles_coordinates_to_ropsi(self):
-        self.psi_nodes_array = np.array([])
-        self.ro_nodes_array = np.array([])
-        self.z_nodes_array = np.array([])
         number_of_points = self.GetNumberOfHandles()
-        for i in range(number_of_points):
-            x = self.GetHandlePosition(i)[0]  # why not in the single line?
-            y = self.GetHandlePosition(i)[1]
-            z = self.GetHandlePosition(i)[2]
-            arg = (self.Z - y) / (self.Z - self.h * self.gamma)
-            if arg > 1.0:
-                arg = 1.0
-            psi = asin(arg)
-            ro = sqrt(x ** 2)
-            self.psi_nodes_array = np.append(self.psi_nodes_array, psi)
-            self.ro_nodes_array = np.append(self.ro_nodes_array, ro)
-            self.z_nodes_array = np.append(self.z_nodes_array, y)
+        positions = np.array([self.GetHandlePosition(i) for i in range(number_of_points)],
+                             dtype=float).reshape(-1, 3)
+        arg = (self.Z - positions[:, 1]) / (self.Z - self.h * self.gamma)
+        # To prevent domain error:
+        self.psi_nodes_array = np.arcsin(np.clip(arg, -1.0, 1.0))
+        self.ro_nodes_array = np.abs(positions[:, 0])
+        self.z_nodes_array = positions[:, 1]
 
     def _ropsi_to_xyz(self):
         x = []
@@ -5,6 +5,7 @@ from SplineMeasurement.engine.toolkit.ultrasound_toolkit import UltrasoundToolki
 from SplineMeasurement.engine.toolkit.mesh_toolkit import MeshToolkit
 
 from SplineMeasurement.additions.decorators import check_initialization
+from SplineMeasurement.meridians_files import meridians_file
 
 
 # CODE REGIONS:
@@ -335,6 +336,27 @@ class MeasEngineManager:
                 "Zmax": self._right_meridian_spline_widgets_list[i].get_Z()*scale_coeff  # same as in "epi"
             }
 
+    def write_meridians_file(self, file_name=None):
+        """
+        Write the packed measurement results (see save_meridians_dict) to the meridians file
+
+        Parameters
+        ----------
+        file_name : str
+            data directory/meridians.npz if None
+
+        Returns
+        -------
+        write_meridians_file : str
+            written file name
+        """
+        if file_name is None:
+            if self._data_dir is None:
+                raise ValueError("Data folder wasn't loaded")
+            file_name = os.path.join(self._data_dir, meridians_file.MERIDIANS_FILE_NAME)
+        meridians_file.save_meridians_file(file_name, self._data_dict)
+        return file_name
+
 
 # IMAGE ACTIONS (ultrasound toolkit):
 
@@ -208,7 +208,13 @@ class MeasurementWidget(QtWidgets.QWidget):
         self._engine_manager.save_meridians_dict()
         self._local_storage.upload_data(self._storage_regist_key,
                                         self._engine_manager.get_data_dict())
-        self.set_info_status("Measurements were loaded to the local storage")
+        # keep a copy on disk to not lose the measurements:
+        try:
+            file_name = self._engine_manager.write_meridians_file()
+            self.set_info_status("Measurements were loaded to the local storage and saved to " + file_name)
+        except (IOError, ValueError) as error:
+            self.set_info_status("Measurements were loaded to the local storage, but not saved to the file: {}".format(
+                error))
 
     def connect_with_storage(self, local_storage):
         """
@@ -0,0 +1,98 @@
+import os
+import numpy as np
+
+
+# Meridians file (numpy npz archive, not compressed) - the measurement results
+# (MeasEngineManager.save_meridians_dict structure) of one patient:
+# schema_version - int, file format version
+# h              - float, common for all meridians
+# for every layer (epi, endo):
+# <layer>_ro, <layer>_z - float64, spline nodes of all meridians one after another
+# <layer>_offsets       - int64 (meridians + 1), nodes of the meridian i are [offsets[i]:offsets[i + 1]]
+# <layer>_Zmax          - float64 (meridians, )
+
+SCHEMA_VERSION = 1
+MERIDIANS_FILE_NAME = "meridians.npz"
+
+_LAYERS = ("epi", "endo")
+
+
+def save_meridians_file(file_name, data_dict):
+    """
+    Write the meridians dict to the file
+
+    Parameters
+    ----------
+    file_name : str
+
+    data_dict : dict
+        keys:
+        meridians : list of dicts (epi, endo: dicts with ro, z, Zmax)
+        common : dict (h)
+    """
+    arrays = {
+        "schema_version": np.array(SCHEMA_VERSION, dtype="int64"),
+        "h": np.array(data_dict["common"]["h"], dtype="float64")
+    }
+    for layer in _LAYERS:
+        ro_list = [np.asarray(meridian[layer]["ro"], dtype="float64") for meridian in data_dict["meridians"]]
+        z_list = [np.asarray(meridian[layer]["z"], dtype="float64") for meridian in data_dict["meridians"]]
+        if any(len(ro) != len(z) for ro, z in zip(ro_list, z_list)):
+            raise ValueError("ro and z nodes numbers are different in the {} layer".format(layer))
+
+        offsets = np.zeros(len(ro_list) + 1, dtype="int64")
+        offsets[1:] = np.cumsum([len(ro) for ro in ro_list])
+
+        arrays[layer + "_ro"] = np.concatenate(ro_list) if ro_list else np.array([], dtype="float64")
+        arrays[layer + "_z"] = np.concatenate(z_list) if z_list else np.array([], dtype="float64")
+        arrays[layer + "_offsets"] = offsets
+        arrays[layer + "_Zmax"] = np.array([meridian[layer]["Zmax"] for meridian in data_dict["meridians"]],
+                                           dtype="float64")
+
+    # write to a temporary file and replace the original one,
+    # so the previous version is not lost if the writing fails
+    temp_file_name = file_name + ".tmp"
+    with open(temp_file_name, "wb") as meridians_file:
+        np.savez(meridians_file, **arrays)
+    os.replace(temp_file_name, file_name)
+
+
+def load_meridians_file(file_name):
+    """
+    Read the meridians dict from the file.
+    Nodes are numpy arrays (views of the layer arrays), Zmax and h are floats
+
+    Parameters
+    ----------
+    file_name : str
+
+    Returns
+    -------
+    load_meridians_file : dict
+        keys:
+        meridians : list of dicts (epi, endo: dicts with ro, z, Zmax)
+        common : dict (h)
+    """
+    with np.load(file_name, allow_pickle=False) as archive:
+        arrays = {key: archive[key] for key in archive.files}
+
+    schema_version = int(arrays["schema_version"])
+    if schema_version != SCHEMA_VERSION:
+        raise ValueError("Unsupported meridians file version: {} (supported: {})".format(schema_version,
+                                                                                        SCHEMA_VERSION))
+
+    meridians_number = len(arrays["epi_Zmax"])
+    meridians = [{} for _ in range(meridians_number)]
+    for layer in _LAYERS:
+        offsets = arrays[layer + "_offsets"]
+        for i in range(meridians_number):
+            meridians[i][layer] = {
+                "ro": arrays[layer + "_ro"][offsets[i]:offsets[i + 1]],
+                "z": arrays[layer + "_z"][offsets[i]:offsets[i + 1]],
+                "Zmax": float(arrays[layer + "_Zmax"][i])
+            }
+
+    return {
+        "meridians": meridians,
+        "common": {"h": float(arrays["h"])}
+    }
@@ -0,0 +1,86 @@
+"""
+Headless batch of fibrosis realizations.
+
+Embeds fibrosis into the same cube (heart.bin and fibers.bin, e.g. from batch_reconstruction.py --cube)
+for every combination of the percents and seeds without the GUI (PyQt5 is not imported).
+Realizations are written in parallel by a process pool, every one to it's own directory
+(heart.bin, fibers.bin and fibrosis.json with the spec and the realized fraction),
+the base cube files are shared by the processes read-only (memory-mapped).
+
+Example:
+
+    python batch_fibrosis.py results/patient -o realizations --percent 5 10 20 --seeds 10 --pattern exact
+"""
+import os
+import sys
+import argparse
+
+from DiffuseFibrosis.fibrosis import fibrosis_realizations
+from DiffuseFibrosis.diff_fibrosis_engine_manager import FIBROSIS_PATTERNS
+
+
+def get_specs(percents, seeds, pattern, correlation_length=2.):
+    """
+    Get the realizations specs for every percent and seed
+
+    Parameters
+    ----------
+    percents : list
+
+    seeds : list
+
+    pattern : str
+        see FIBROSIS_PATTERNS
+
+    correlation_length : float or list
+        correlated pattern only
+
+    Returns
+    -------
+    get_specs : list
+        specs dicts (see fibrosis_realizations.get_realization_spec)
+    """
+    return [{"percent": percent, "seed": seed, "pattern": pattern, "correlation_length": correlation_length}
+            for percent in percents for seed in seeds]
+
+
+def parse_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Headless fibrosis realizations")
+    parser.add_argument("base", help="directory with heart.bin and fibers.bin")
+    parser.add_argument("-o", "--output", default="realizations", help="output directory")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="number of processes")
+    parser.add_argument("--percent", type=float, nargs="+", required=True, help="fibrosis percents")
+    parser.add_argument("--seeds", type=int, default=1, help="realizations number of every percent")
+    parser.add_argument("--first-seed", type=int, default=0, help="seeds are first-seed, first-seed + 1, ...")
+    parser.add_argument("--pattern", choices=FIBROSIS_PATTERNS, default="exact")
+    parser.add_argument("--correlation-length", type=float, nargs="+", default=[2.],
+                        help="patches size (voxels), 1 or 3 values, correlated pattern only")
+    parser.add_argument("--chunk-planes", type=int, default=32, help="cube planes processed at once")
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
+    arguments = parse_arguments(arguments)
+
+    correlation_length = arguments.correlation_length
+    if len(correlation_length) == 1:
+        correlation_length = correlation_length[0]
+    specs = get_specs(arguments.percent, range(arguments.first_seed, arguments.first_seed + arguments.seeds),
+                      arguments.pattern, correlation_length)
+
+    failed = 0
+    for spec, result, error in fibrosis_realizations.write_realizations(arguments.base, arguments.output, specs,
+                                                                        arguments.workers, arguments.chunk_planes):
+        if error is not None:
+            failed += 1
+            print(">>> {}: failed ({}: {})".format(spec["name"], type(error).__name__, error))
+        else:
+            print(">>> {}: {:.4f} % of tissue, {:.2f} s -> {}".format(spec["name"], 100.*result["fraction"],
+                                                                      result["time"], result["directory"]))
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
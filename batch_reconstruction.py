@@ -0,0 +1,255 @@
+"""
+Headless batch reconstruction.
+
+Reconstructs the left ventricle (vertices mesh with fibers, polygonal surfaces and,
+optionally, TNNP-CUDA cube files) for a number of patients without the GUI (PyQt5 is not imported).
+Input files are the meridians dicts (the structure of MeasEngineManager.save_meridians_dict)
+saved as meridians files (npz, see SplineMeasurement.meridians_files) or json,
+patients are processed in parallel by a process pool.
+
+Example:
+
+    python batch_reconstruction.py patients/*/meridians.npz -o results --workers 4 --cube
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from LVSplineReconstruction.recon_engine_manager import ReconEngineManager
+from CUDACubeFiles.cube_generator.cube_generator import CubeGenerator
+from SplineMeasurement.meridians_files import meridians_file
+from LVSplineReconstruction.additions import vtk_writers
+
+
+def load_meridians_file(file_name):
+    """
+    Load the meridians dict
+
+    Parameters
+    ----------
+    file_name : str
+        npz meridians file or json file
+
+    Returns
+    -------
+    load_meridians_file : dict
+        keys: meridians, common
+    """
+    if file_name.endswith(".npz"):
+        return meridians_file.load_meridians_file(file_name)
+    with open(file_name) as json_file:
+        return json.load(json_file)
+
+
+def get_patient_name(file_name):
+    """
+    Get the patient name: file name without extension,
+    or the folder name for the default meridians file name (saved by the measurement Upload)
+
+    Parameters
+    ----------
+    file_name : str
+
+    Returns
+    -------
+    get_patient_name : str
+    """
+    if os.path.basename(file_name) == meridians_file.MERIDIANS_FILE_NAME:
+        return os.path.basename(os.path.dirname(os.path.abspath(file_name)))
+    return os.path.splitext(os.path.basename(file_name))[0]
+
+
+def check_patient_names(file_names):
+    """
+    Check that the patients names are unique (patients with the same name would overwrite each other's files)
+
+    Parameters
+    ----------
+    file_names : list
+        meridians files
+    """
+    patients = {}
+    for file_name in file_names:
+        patients.setdefault(get_patient_name(file_name), []).append(file_name)
+    duplicates = ["{} ({})".format(name, ", ".join(names)) for name, names in patients.items() if len(names) > 1]
+    if duplicates:
+        raise ValueError("Patients names must be unique: {}".format("; ".join(duplicates)))
+
+
+def reconstruct_patient(file_name, output_directory, options):
+    """
+    Reconstruct a single patient and write the results to output_directory/patient_name
+
+    Parameters
+    ----------
+    file_name : str
+        meridians file
+
+    output_directory : str
+
+    options : dict
+        wall_points, surface_points, layers, gamma_0, gamma_1,
+        file_format ("vtk" - legacy, "xml" - vtu/vtp), compressor, float32 (see vtk_writers.write_data_object),
+        cube (bool), cube_parameters (dict, see CubeGenerator)
+
+    Returns
+    -------
+    reconstruct_patient : dict
+        keys: patient, directory, mesh_points, files (list of write reports: file_name, bytes, time), time
+    """
+    start_time = time.time()
+
+    patient_directory = os.path.join(output_directory, get_patient_name(file_name))
+    os.makedirs(patient_directory, exist_ok=True)
+
+    engine_manager = ReconEngineManager()
+    engine_manager.set_data_dict(load_meridians_file(file_name))
+    engine_manager.set_wall_points(options["wall_points"])
+    engine_manager.set_surface_points(options["surface_points"])
+    engine_manager.set_layers_number(options["layers"])
+    engine_manager.set_gamma_0(options["gamma_0"])
+    engine_manager.set_gamma_1(options["gamma_1"])
+
+    engine_manager.construct_mesh()
+    engine_manager.construct_polygonal_surfaces()
+
+    if options.get("file_format", "vtk") == "xml":
+        mesh_file_name, surface_file_name = "MeshwFibers.vtu", "LVSurfaces.vtp"
+    else:
+        mesh_file_name, surface_file_name = "MeshwFibers.vtk", "LVSurfaces.vtk"
+    write_options = {"compressor": options.get("compressor", "zlib"), "float32": options.get("float32", False)}
+    files = [
+        engine_manager.write_unstructured_grid(os.path.join(patient_directory, mesh_file_name), **write_options),
+        engine_manager.write_polydata_grid(os.path.join(patient_directory, surface_file_name), **write_options)
+    ]
+
+    reconstructed = engine_manager.get_reconstructed()
+
+    if options["cube"]:
+        cube_generator = CubeGenerator()
+        cube_generator.read_mesh(reconstructed["mesh"])
+        cube_generator.read_surface(reconstructed["surface"])
+        # patients are already processed in parallel:
+        cube_generator.set_parameters(dict(options["cube_parameters"], workers=1))
+        cube_generator.set_output_directory(patient_directory)
+        cube_generator.generate_cubes()
+
+    return {
+        "patient": get_patient_name(file_name),
+        "directory": patient_directory,
+        "mesh_points": reconstructed["mesh"].GetNumberOfPoints(),
+        "files": files,
+        "time": time.time() - start_time
+    }
+
+
+def reconstruct_patients(file_names, output_directory, options, workers=1):
+    """
+    Reconstruct patients in parallel, yields the results as they are completed
+
+    Parameters
+    ----------
+    file_names : list
+        meridians files
+
+    output_directory : str
+
+    options : dict
+        see reconstruct_patient
+
+    workers : int
+        number of processes
+
+    Returns
+    -------
+    reconstruct_patients : generator
+        [file_name, result, error] - result is None if the reconstruction failed
+    """
+    check_patient_names(file_names)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(reconstruct_patient, file_name, output_directory, options): file_name
+                   for file_name in file_names}
+        for future in as_completed(futures):
+            try:
+                yield [futures[future], future.result(), None]
+            except Exception as error:
+                yield [futures[future], None, error]
+
+
+def parse_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Headless left ventricle reconstruction")
+    parser.add_argument("files", nargs="+", help="meridians files (npz or json)")
+    parser.add_argument("-o", "--output", default="reconstruction", help="output directory")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="number of processes")
+    parser.add_argument("--wall-points", type=int, default=100, help="psi layers number")
+    parser.add_argument("--surface-points", type=int, default=100, help="phi layers number")
+    parser.add_argument("--layers", type=int, default=10, help="gamma layers number")
+    parser.add_argument("--gamma-0", type=float, default=0.)
+    parser.add_argument("--gamma-1", type=float, default=1.)
+    parser.add_argument("--format", choices=["vtk", "xml"], default="vtk",
+                        help="binary legacy vtk or xml (vtu, vtp) files")
+    parser.add_argument("--compressor", choices=list(vtk_writers.COMPRESSORS) + ["none"], default="zlib",
+                        help="xml files compression")
+    parser.add_argument("--float32", action="store_true", help="write fibers as float instead of double")
+    parser.add_argument("--cube", action="store_true", help="generate TNNP-CUDA cube files")
+    parser.add_argument("--n-side", type=int, default=100)
+    parser.add_argument("--x0cube", type=float, default=-50.)
+    parser.add_argument("--y0cube", type=float, default=-50.)
+    parser.add_argument("--z0cube", type=float, default=-5.)
+    parser.add_argument("--dr", type=float, default=1.)
+    parser.add_argument("--classifier", choices=["normals", "distance"], default="normals")
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
+    arguments = parse_arguments(arguments)
+
+    options = {
+        "wall_points": arguments.wall_points,
+        "surface_points": arguments.surface_points,
+        "layers": arguments.layers,
+        "gamma_0": arguments.gamma_0,
+        "gamma_1": arguments.gamma_1,
+        "file_format": arguments.format,
+        "compressor": None if arguments.compressor == "none" else arguments.compressor,
+        "float32": arguments.float32,
+        "cube": arguments.cube,
+        "cube_parameters": {
+            "n_side": arguments.n_side,
+            "x0cube": arguments.x0cube,
+            "y0cube": arguments.y0cube,
+            "z0cube": arguments.z0cube,
+            "dr": arguments.dr,
+            "classifier": arguments.classifier
+        }
+    }
+
+    try:
+        check_patient_names(arguments.files)
+    except ValueError as error:
+        print(">>> {}".format(error))
+        return 1
+
+    failed = 0
+    for file_name, result, error in reconstruct_patients(arguments.files, arguments.output,
+                                                         options, arguments.workers):
+        if error is not None:
+            failed += 1
+            print(">>> {}: failed ({}: {})".format(file_name, type(error).__name__, error))
+        else:
+            print(">>> {}: {} mesh points, {:.2f} s -> {}".format(result["patient"], result["mesh_points"],
+                                                                 result["time"], result["directory"]))
+            for report in result["files"]:
+                print("    {}: {:.2f} MB, {:.2f} s".format(os.path.basename(report["file_name"]),
+                                                         report["bytes"]/2**20, report["time"]))
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,34 @@
+import os
+import sys
+import pickle
+import hashlib
+from collections import OrderedDict
+import numpy as np
 
 
 class LocalStorage:
     """
     Store data and binds packages for data exchange.
-    Works as a chain, but can be extended to a more complicated behaviour
+    Works as a chain, but can be extended to a more complicated behaviour.
+
+    Also works as an artifact cache: packages outputs are stored under a hash of their
+    inputs and parameters (see compute_key), so a previous parameter set is not recomputed.
+    The least recently used artifacts are removed when the memory budget is exceeded,
+    or written to the spill directory (if set and the artifact can be pickled).
+    Stored artifacts are shared, they should not be changed
     """
-    def __init__(self):
+    def __init__(self, memory_budget=1024*2**20, spill_directory=None):
+        """
+        Parameters
+        ----------
+        memory_budget : int
+            max size of the artifacts in memory (bytes)
+
+        spill_directory : str
+            directory for the artifacts removed from memory, if None - they are dropped
+        """
         self._storage_dict = {}
+        self._keys_dict = {}  # keys of the uploaded data
 
         # Keys list:
         # "VarBaseMeasurement" - spline measurement package,
@@ -14,6 +36,14 @@ class LocalStorage:
         # "CUDACubes"          - generate bin files for TNNP-CUDA software,
         # "DiffFibrosis"       - generate diff. fibrosis for TNNP-CUDA software
 
+        self._artifacts = OrderedDict()  # key: [artifact, size], in the order of use
+        self._spilled_artifacts = set()
+        self._memory_budget = memory_budget
+        self._memory_used = 0
+        self._spill_directory = spill_directory
+
+        self._statistics = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "spills": 0}
+
     def add_block(self, key_str):
         """
         Register a new package to store it's data
@@ -24,6 +54,16 @@ class LocalStorage:
             Package registry key
         """
         self._storage_dict[key_str] = {}
+        self._keys_dict[key_str] = None
+
+    @staticmethod
+    def _get_source_block(key_str):
+        if key_str == "Reconstruction":
+            return "VarBaseMeasurement"
+        elif key_str == "CUDACubes":
+            return "Reconstruction"
+        elif key_str == "DiffFibrosis":
+            return "CUDACubes"
 
     def get_access(self, key_str):
         """
@@ -34,14 +74,27 @@ class LocalStorage:
         key_str :
             Package registry key
         """
-        if key_str == "Reconstruction":
-            return self._storage_dict["VarBaseMeasurement"]
-        elif key_str == "CUDACubes":
-            return self._storage_dict["Reconstruction"]
-        elif key_str == "DiffFibrosis":
-            return self._storage_dict["CUDACubes"]
+        source_block = self._get_source_block(key_str)
+        if source_block is not None:
+            return self._storage_dict.get(source_block)
+
+    def get_access_key(self, key_str):
+        """
+        Get the content key of the data for corresponding package (see get_access)
+
+        Parameters
+        ----------
+        key_str :
+            Package registry key
 
-    def upload_data(self, block_str, data_dict):
+        Returns
+        -------
+        get_access_key : str
+            None if the data key is unknown
+        """
+        return self._keys_dict.get(self._get_source_block(key_str))
+
+    def upload_data(self, block_str, data_dict, key=None):
         """
         Upload data for corresponding package
 
@@ -51,6 +104,235 @@ class LocalStorage:
             Package registry key
 
         data_dict : dict
+
+        key : str
+            content key of the data (see compute_key), computed from the data if None
         """
         self._storage_dict[block_str] = data_dict
+        if key is None:
+            try:
+                key = self.compute_key(block_str, data_dict)
+            except TypeError:
+                pass  # data can't be hashed (vtk objects)
+        self._keys_dict[block_str] = key
+
+# ARTIFACTS CACHE:
+
+    @classmethod
+    def _update_hash(cls, hasher, value):
+        if isinstance(value, np.generic):
+            cls._update_hash(hasher, value.item())
+        elif value is None or isinstance(value, (bool, int, float, str, bytes)):
+            hasher.update(repr((type(value).__name__, value)).encode())
+        elif isinstance(value, np.ndarray):
+            hasher.update(repr(("ndarray", value.dtype.str, value.shape)).encode())
+            hasher.update(np.ascontiguousarray(value).tobytes())
+        elif isinstance(value, dict):
+            hasher.update(repr(("dict", len(value))).encode())
+            for item_key in sorted(value, key=repr):
+                cls._update_hash(hasher, item_key)
+                cls._update_hash(hasher, value[item_key])
+        elif isinstance(value, (list, tuple)) and cls._is_numeric_list(value):
+            # lists of numbers and arrays have the same key (measurements are lists, files give arrays)
+            cls._update_hash(hasher, np.asarray(value))
+        elif isinstance(value, (list, tuple)):
+            hasher.update(repr(("sequence", len(value))).encode())
+            for item in value:
+                cls._update_hash(hasher, item)
+        else:
+            raise TypeError("Can't compute the key of {} object".format(type(value).__name__))
+
+    @staticmethod
+    def _is_numeric_list(value):
+        return all(isinstance(item, (int, float, np.number)) and not isinstance(item, bool) for item in value)
+
+    @classmethod
+    def compute_key(cls, *parts):
+        """
+        Compute the content key of the artifact inputs
+
+        Parameters
+        ----------
+        parts :
+            inputs and parameters: numbers, strings, numpy arrays, lists and dicts of them,
+            keys of other artifacts (to chain the packages)
 
+        Returns
+        -------
+        compute_key : str
+            sha256 hex digest
+        """
+        hasher = hashlib.sha256()
+        cls._update_hash(hasher, list(parts) if parts else None)
+        return hasher.hexdigest()
+
+    @classmethod
+    def _get_size(cls, artifact):
+        if isinstance(artifact, np.ndarray):
+            return artifact.nbytes
+        if hasattr(artifact, "GetActualMemorySize"):  # vtk data objects (kibibytes)
+            return artifact.GetActualMemorySize()*1024
+        if isinstance(artifact, dict):
+            return sys.getsizeof(artifact) + sum(cls._get_size(value) for value in artifact.values())
+        if isinstance(artifact, (list, tuple)):
+            return sys.getsizeof(artifact) + sum(cls._get_size(value) for value in artifact)
+        return sys.getsizeof(artifact)
+
+    def _get_spill_file_name(self, key):
+        return os.path.join(self._spill_directory, key + ".pkl")
+
+    def _spill(self, key, artifact):
+        if self._spill_directory is None:
+            return
+        file_name = self._get_spill_file_name(key)
+        try:
+            os.makedirs(self._spill_directory, exist_ok=True)
+            with open(file_name + ".tmp", "wb") as spill_file:
+                pickle.dump(artifact, spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(file_name + ".tmp", file_name)
+        except (pickle.PicklingError, TypeError, AttributeError, OSError):
+            # can't be pickled (e.g. vtk objects of the old versions) - only dropped
+            if os.path.exists(file_name + ".tmp"):
+                os.remove(file_name + ".tmp")
+            return
+        self._spilled_artifacts.add(key)
+        self._statistics["spills"] += 1
+
+    def _evict(self):
+        while self._memory_used > self._memory_budget and self._artifacts:
+            key, (artifact, size) = self._artifacts.popitem(last=False)
+            self._memory_used -= size
+            self._statistics["evictions"] += 1
+            if key not in self._spilled_artifacts:
+                self._spill(key, artifact)
+
+    def put_artifact(self, key, artifact):
+        """
+        Store the artifact
+
+        Parameters
+        ----------
+        key : str
+            see compute_key
+
+        artifact : object
+        """
+        if key in self._artifacts:
+            self._memory_used -= self._artifacts.pop(key)[1]
+        if key in self._spilled_artifacts:
+            # the new version replaces the spilled one
+            self._spilled_artifacts.discard(key)
+            os.remove(self._get_spill_file_name(key))
+
+        size = self._get_size(artifact)
+        self._artifacts[key] = [artifact, size]
+        self._memory_used += size
+        self._evict()
+
+    def get_artifact(self, key):
+        """
+        Get the stored artifact
+
+        Parameters
+        ----------
+        key : str
+            see compute_key
+
+        Returns
+        -------
+        get_artifact : object
+            None if the artifact isn't stored
+        """
+        if key in self._artifacts:
+            self._artifacts.move_to_end(key)
+            self._statistics["hits"] += 1
+            return self._artifacts[key][0]
+
+        if key in self._spilled_artifacts:
+            try:
+                with open(self._get_spill_file_name(key), "rb") as spill_file:
+                    artifact = pickle.load(spill_file)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                self._spilled_artifacts.discard(key)
+            else:
+                self._statistics["disk_hits"] += 1
+                size = self._get_size(artifact)
+                self._artifacts[key] = [artifact, size]
+                self._memory_used += size
+                self._evict()
+                return artifact
+
+        self._statistics["misses"] += 1
+        return None
+
+    def has_artifact(self, key):
+        """
+        Check if the artifact is stored (in memory or on disk)
+
+        Parameters
+        ----------
+        key : str
+
+        Returns
+        -------
+        has_artifact : bool
+        """
+        return key in self._artifacts or key in self._spilled_artifacts
+
+    def set_memory_budget(self, memory_budget):
+        """
+        Set max size of the artifacts in memory
+
+        Parameters
+        ----------
+        memory_budget : int
+            bytes
+        """
+        self._memory_budget = memory_budget
+        self._evict()
+
+    def set_spill_directory(self, spill_directory):
+        """
+        Set directory for the artifacts removed from memory
+
+        Parameters
+        ----------
+        spill_directory : str
+            if None - removed artifacts are dropped
+        """
+        self._spill_directory = spill_directory
+        self._spilled_artifacts = set()
+
+    def get_memory_used(self):
+        """
+        Get size of the artifacts in memory
+
+        Returns
+        -------
+        get_memory_used : int
+            bytes
+        """
+        return self._memory_used
+
+    def get_statistics(self):
+        """
+        Get the cache usage statistics
+
+        Returns
+        -------
+        get_statistics : dict
+            keys: hits, disk_hits, misses, evictions, spills
+        """
+        return dict(self._statistics)
+
+    def clear_artifacts(self):
+        """
+        Remove all the stored artifacts (spilled files too)
+        """
+        for key in self._spilled_artifacts:
+            file_name = self._get_spill_file_name(key)
+            if os.path.exists(file_name):
+                os.remove(file_name)
+        self._artifacts = OrderedDict()
+        self._spilled_artifacts = set()
+        self._memory_used = 0
@@ -0,0 +1,388 @@
+import copy
+from local_storage import LocalStorage
+
+
+class Pipeline:
+    """
+    Dependency-tracked chain of the packages actions (stages).
+
+    Each stage declares its input stages and parameters, its fingerprint is the key
+    (see LocalStorage.compute_key) of the inputs output keys and the parameters.
+    A stage is rerun only if its fingerprint was changed (or it was invalidated),
+    and if the rerun stage output is the same as before (early cutoff),
+    the downstream stages are not rerun too.
+    """
+    def __init__(self, local_storage=None):
+        """
+        Parameters
+        ----------
+        local_storage : object
+            LocalStorage class object, stages outputs are uploaded to it's blocks (if set)
+        """
+        self._local_storage = local_storage
+
+        self._stages = {}  # name: stage dict, in the order of adding
+        # stage dict keys:
+        # "function"    - function(inputs_dict, parameters_dict) -> output
+        # "inputs"      - list of the input stages names
+        # "parameters"  - dict
+        # "volatile"    - bool, stage reads an external state and runs every time
+        # "block"       - LocalStorage block to upload the output (or None)
+        # "fingerprint" - fingerprint of the last run
+        # "output"      - output of the last run
+        # "output_key"  - content key of the last output
+        # "invalidated" - bool, stage must be rerun
+        # "statistics"  - dict (runs, skips, cutoffs)
+
+        self._last_run = []
+
+    def add_stage(self, name, function, inputs=(), parameters=None, volatile=False, block=None):
+        """
+        Add the stage
+
+        Parameters
+        ----------
+        name : str
+
+        function : callable
+            function(inputs_dict, parameters_dict) -> output,
+            inputs_dict - input stage name: it's output
+
+        inputs : list
+            names of the stages added before
+
+        parameters : dict
+            numbers, strings, arrays (see LocalStorage.compute_key)
+
+        volatile : bool
+            the stage reads an external state (e.g. the measurement splines) and is run every time,
+            downstream stages are rerun only if it's output was changed
+
+        block : str
+            LocalStorage block the output is uploaded to (e.g. "Reconstruction")
+        """
+        if name in self._stages:
+            raise ValueError("Stage {} is already added".format(name))
+        for input_name in inputs:
+            if input_name not in self._stages:
+                raise ValueError("Unknown input stage {} of {}".format(input_name, name))
+
+        self._stages[name] = {
+            "function": function,
+            "inputs": list(inputs),
+            "parameters": dict(parameters or {}),
+            "volatile": volatile,
+            "block": block,
+            "fingerprint": None,
+            "output": None,
+            "output_key": None,
+            "invalidated": True,
+            "statistics": {"runs": 0, "skips": 0, "cutoffs": 0}
+        }
+
+    def _get_stage(self, name):
+        try:
+            return self._stages[name]
+        except KeyError:
+            raise ValueError("Unknown stage {}".format(name))
+
+    def set_parameters(self, name, parameters_dict):
+        """
+        Set the stage parameters (the stage is rerun on the next run if they were changed)
+
+        Parameters
+        ----------
+        name : str
+
+        parameters_dict : dict
+        """
+        self._get_stage(name)["parameters"] = dict(parameters_dict)
+
+    def update_parameters(self, name, parameters_dict):
+        """
+        Change a part of the stage parameters
+
+        Parameters
+        ----------
+        name : str
+
+        parameters_dict : dict
+        """
+        self._get_stage(name)["parameters"].update(parameters_dict)
+
+    def invalidate(self, name):
+        """
+        Force the stage rerun on the next run (downstream stages are rerun if it's output is changed)
+
+        Parameters
+        ----------
+        name : str
+        """
+        self._get_stage(name)["invalidated"] = True
+
+    def _get_fingerprint(self, name, stage):
+        return LocalStorage.compute_key(name,
+                                        [self._stages[input_name]["output_key"] for input_name in stage["inputs"]],
+                                        stage["parameters"])
+
+    def _get_output_key(self, name, stage, output, fingerprint):
+        try:
+            return LocalStorage.compute_key(name, output)
+        except TypeError:
+            # output can't be hashed (vtk objects) - defined by the inputs,
+            # except the volatile stages, their outputs are considered new every run
+            if stage["volatile"]:
+                return LocalStorage.compute_key(fingerprint, stage["statistics"]["runs"])
+            return fingerprint
+
+    def _run_stage(self, name, completed):
+        if name in completed:
+            return
+        stage = self._stages[name]
+        for input_name in stage["inputs"]:
+            self._run_stage(input_name, completed)
+        completed.add(name)
+
+        fingerprint = self._get_fingerprint(name, stage)
+        if not stage["volatile"] and not stage["invalidated"] and fingerprint == stage["fingerprint"]:
+            stage["statistics"]["skips"] += 1
+            return
+
+        inputs_dict = {input_name: self._stages[input_name]["output"] for input_name in stage["inputs"]}
+        output = stage["function"](inputs_dict, dict(stage["parameters"]))
+        stage["statistics"]["runs"] += 1
+        self._last_run.append(name)
+
+        output_key = self._get_output_key(name, stage, output, fingerprint)
+        if output_key == stage["output_key"]:
+            stage["statistics"]["cutoffs"] += 1
+
+        stage["fingerprint"] = fingerprint
+        stage["output"] = output
+        stage["output_key"] = output_key
+        stage["invalidated"] = False
+
+        if self._local_storage is not None and stage["block"] is not None:
+            self._local_storage.upload_data(stage["block"], output, output_key)
+
+    def run(self, name=None):
+        """
+        Run the stage with all it's upstream stages, only invalidated stages are rerun
+
+        Parameters
+        ----------
+        name : str
+            if None - all the stages are run
+
+        Returns
+        -------
+        run : object
+            the stage output (None if name is None)
+        """
+        self._last_run = []
+        completed = set()
+        if name is None:
+            for stage_name in self._stages:
+                self._run_stage(stage_name, completed)
+            return None
+        self._get_stage(name)
+        self._run_stage(name, completed)
+        return self._stages[name]["output"]
+
+    def get_output(self, name):
+        """
+        Get output of the last stage run
+
+        Parameters
+        ----------
+        name : str
+
+        Returns
+        -------
+        get_output : object
+            None if the stage wasn't run
+        """
+        return self._get_stage(name)["output"]
+
+    def get_output_key(self, name):
+        """
+        Get content key of the stage output
+
+        Parameters
+        ----------
+        name : str
+
+        Returns
+        -------
+        get_output_key : str
+            None if the stage wasn't run
+        """
+        return self._get_stage(name)["output_key"]
+
+    def get_parameters(self, name):
+        """
+        Get the stage parameters
+
+        Parameters
+        ----------
+        name : str
+
+        Returns
+        -------
+        get_parameters : dict
+        """
+        return dict(self._get_stage(name)["parameters"])
+
+    def get_stages(self):
+        """
+        Get names of the stages in the order of adding
+
+        Returns
+        -------
+        get_stages : list
+        """
+        return list(self._stages)
+
+    def get_last_run(self):
+        """
+        Get names of the stages which were actually run by the last run call
+
+        Returns
+        -------
+        get_last_run : list
+        """
+        return list(self._last_run)
+
+    def get_statistics(self, name):
+        """
+        Get the stage statistics
+
+        Parameters
+        ----------
+        name : str
+
+        Returns
+        -------
+        get_statistics : dict
+            keys:
+            runs    - number of the stage runs
+            skips   - number of the skipped runs (fingerprint wasn't changed)
+            cutoffs - number of runs with the same output as before (downstream weren't invalidated)
+        """
+        return dict(self._get_stage(name)["statistics"])
+
+
+def build_lv_pipeline(recon_engine_manager, cube_engine_manager=None, diff_fibrosis_engine_manager=None,
+                      meas_engine_manager=None, local_storage=None):
+    """
+    Build the pipeline of the packages (stages):
+    save_meridians_dict -> construct_mesh -> construct_polygonal_surfaces -> generate_cubes -> embed_fibrosis
+
+    Parameters
+    ----------
+    recon_engine_manager : object
+        ReconEngineManager class object
+
+    cube_engine_manager : object
+        CubeEngineManager class object, generate_cubes stage is not added if None
+
+    diff_fibrosis_engine_manager : object
+        DiffFibrosisEngineManager class object, embed_fibrosis stage is not added if None
+
+    meas_engine_manager : object
+        MeasEngineManager class object, the meridians are taken from it's splines (volatile stage),
+        if None - from the "data_dict" parameter of save_meridians_dict stage
+
+    local_storage : object
+        LocalStorage class object, used as the packages data frame and the artifacts cache
+
+    Returns
+    -------
+    build_lv_pipeline : Pipeline
+
+    Stages parameters:
+    save_meridians_dict          - data_dict (if meas_engine_manager is None)
+    construct_mesh               - wall_points, surface_points, layers, gamma_0, gamma_1
+    construct_polygonal_surfaces - no parameters
+    generate_cubes               - CubeGenerator parameters dict
+    embed_fibrosis               - percent, pattern, correlation_length, seed (see DiffFibrosisEngineManager)
+    """
+    pipeline = Pipeline(local_storage)
+
+    if local_storage is not None:
+        recon_engine_manager.set_artifact_cache(local_storage)
+        if cube_engine_manager is not None:
+            cube_engine_manager.set_artifact_cache(local_storage)
+
+    if meas_engine_manager is not None:
+        def save_meridians_dict(inputs_dict, parameters_dict):
+            meas_engine_manager.save_meridians_dict()
+            # splines data dict is changed in place by the next saving:
+            return copy.deepcopy(meas_engine_manager.get_data_dict())
+
+        pipeline.add_stage("save_meridians_dict", save_meridians_dict, volatile=True, block="VarBaseMeasurement")
+    else:
+        def save_meridians_dict(inputs_dict, parameters_dict):
+            return parameters_dict.get("data_dict", {})
+
+        pipeline.add_stage("save_meridians_dict", save_meridians_dict, parameters={"data_dict": {}},
+                           block="VarBaseMeasurement")
+
+    meridians_state = {"key": None}
+
+    def construct_mesh(inputs_dict, parameters_dict):
+        # the spline tables are kept by the reconstruction while the meridians are the same:
+        meridians_key = pipeline.get_output_key("save_meridians_dict")
+        if meridians_key != meridians_state["key"]:
+            recon_engine_manager.set_data_dict(inputs_dict["save_meridians_dict"])
+            meridians_state["key"] = meridians_key
+        recon_engine_manager.set_wall_points(parameters_dict["wall_points"])
+        recon_engine_manager.set_surface_points(parameters_dict["surface_points"])
+        recon_engine_manager.set_layers_number(parameters_dict["layers"])
+        recon_engine_manager.set_gamma_0(parameters_dict["gamma_0"])
+        recon_engine_manager.set_gamma_1(parameters_dict["gamma_1"])
+        # surfaces are reconstructed if the meridians or any parameter (including gamma) were changed:
+        recon_engine_manager.update_mesh()
+        return recon_engine_manager.get_reconstructed()["mesh"]
+
+    pipeline.add_stage("construct_mesh", construct_mesh, inputs=["save_meridians_dict"],
+                       parameters={"wall_points": 100, "surface_points": 100, "layers": 10,
+                                   "gamma_0": 0., "gamma_1": 1.})
+
+    def construct_polygonal_surfaces(inputs_dict, parameters_dict):
+        recon_engine_manager.construct_polygonal_surfaces()
+        return {
+            "mesh": inputs_dict["construct_mesh"],
+            "surface": dict(recon_engine_manager.get_reconstructed()["surface"])
+        }
+
+    pipeline.add_stage("construct_polygonal_surfaces", construct_polygonal_surfaces, inputs=["construct_mesh"],
+                       block="Reconstruction")
+
+    if cube_engine_manager is None:
+        return pipeline
+
+    def generate_cubes(inputs_dict, parameters_dict):
+        cube_engine_manager.set_data_dict(inputs_dict["construct_polygonal_surfaces"],
+                                          pipeline.get_output_key("construct_polygonal_surfaces"))
+        cube_engine_manager.set_parameters(parameters_dict)
+        cube_engine_manager.generate_arrays()
+        return cube_engine_manager.get_arrays()
+
+    pipeline.add_stage("generate_cubes", generate_cubes, inputs=["construct_polygonal_surfaces"],
+                       parameters={"n_side": 100, "x0cube": -50., "y0cube": -50., "z0cube": -5., "dr": 1.},
+                       block="CUDACubes")
+
+    if diff_fibrosis_engine_manager is None:
+        return pipeline
+
+    def embed_fibrosis(inputs_dict, parameters_dict):
+        # fibrosis is embedded into the copies, cube arrays are the same for every run:
+        diff_fibrosis_engine_manager.set_data_dict(inputs_dict["generate_cubes"])
+        diff_fibrosis_engine_manager.embed_fibrosis(**parameters_dict)
+        return diff_fibrosis_engine_manager.get_arrays()
+
+    pipeline.add_stage("embed_fibrosis", embed_fibrosis, inputs=["generate_cubes"],
+                       parameters={"percent": 0.}, block="DiffFibrosis")
+
+    return pipeline